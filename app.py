@@ -4,6 +4,7 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
+from artifact_store import ArtifactStore
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -22,6 +23,12 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['TEMP_FOLDER'] = 'temp'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['MAX_STREAM_CONTENT_LENGTH'] = 2 * 1024 * 1024 * 1024  # 2GB max for streamed decode uploads
+app.config['MAX_IMAGE_SIZE'] = 1024  # Largest longest side accepted for image encoding
+app.config['JOB_WORKERS'] = int(os.environ.get("JOB_WORKERS", 2))  # Background encode/decode threads per process
+app.config['ARTIFACT_QUOTA_BYTES'] = int(os.environ.get("ARTIFACT_QUOTA_BYTES", 2 * 1024 * 1024 * 1024))
+app.config['ARTIFACT_TTL'] = int(os.environ.get("ARTIFACT_TTL", 7 * 24 * 3600))  # Seconds generated files are kept
+app.config['ARTIFACT_SCRATCH_TTL'] = 6 * 3600  # Uploads and half-written files older than this are abandoned
 
 # Configure the database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///sonification.db")
@@ -37,6 +44,10 @@ db.init_app(app)
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['TEMP_FOLDER'], exist_ok=True)
 
+# Generated files and scratch uploads in the temp folder, bounded by quota and TTL
+artifacts = ArtifactStore(app.config['TEMP_FOLDER'], app.config['ARTIFACT_QUOTA_BYTES'], app.config['ARTIFACT_TTL'],
+                          app.config['ARTIFACT_SCRATCH_TTL'])
+
 with app.app_context():
     # Import models and routes
     import models  # noqa: F401
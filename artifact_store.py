@@ -0,0 +1,173 @@
+"""
+Quota-bounded store for generated artifacts (encoded WAVs, decoded images, job results)
+
+Artifacts live in 256 shard directories chosen by a hash of their name, so no
+directory grows without bound and a lookup is a single stat. Writers fill a scratch
+path and commit it with an atomic rename, so readers never see a partial file.
+
+Sweeps run after commits, at most every sweep_interval seconds unless a sizeable
+share of the quota was written since the last one. They remove artifacts older than
+the TTL and abandoned scratch files, then evict the least recently accessed
+artifacts until usage is back under low_water of the byte quota. Access is recorded
+explicitly in each file's atime, so LRU order holds on noatime mounts too.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore:
+    def __init__(self, root, quota_bytes, ttl, scratch_ttl=3600):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self.ttl = ttl  # Seconds an artifact is kept after it was written
+        self.scratch_ttl = scratch_ttl  # Seconds before an abandoned scratch file is removed
+        self.low_water = 0.9  # Eviction frees space down to this fraction of the quota
+        self.sweep_interval = 60.0
+        self.scratch_dir = os.path.join(root, 'scratch')
+
+        self.written = 0  # Bytes committed since the last sweep
+        self.last_sweep = 0.0
+        self.lock = threading.Lock()
+        os.makedirs(self.scratch_dir, exist_ok=True)
+
+    def fits(self, size):
+        """Whether an artifact of `size` bytes can be kept without the next sweep evicting it"""
+        return size <= self.quota_bytes * self.low_water
+
+    def get_path(self, name):
+        """Sharded location of an artifact, whether or not it exists"""
+        shard = hashlib.sha1(name.encode('utf-8')).hexdigest()[:2]
+        return os.path.join(self.root, shard, name)
+
+    def locate(self, name):
+        """Path of a stored artifact, marking it as recently used, or None"""
+        if not name or '..' in name or '/' in name or name.startswith('.'):
+            return None
+
+        # Artifacts written before sharding sit directly in the root
+        for path in (self.get_path(name), os.path.join(self.root, name)):
+            if os.path.isfile(path):
+                self.touch(path)
+                return path
+        return None
+
+    def open(self, name):
+        """Open a stored artifact for binary reading, or None if it is missing or was just evicted"""
+        path = self.locate(name)
+        if path is None:
+            return None
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            return None
+
+    def touch(self, path):
+        """Record an access for LRU eviction, keeping the write time used by the TTL"""
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except OSError:
+            pass
+
+    def scratch_path(self, name):
+        """Private path to write a file to before committing it, keeping name's extension"""
+        return os.path.join(self.scratch_dir, f"{uuid.uuid4().hex}_{name}")
+
+    def commit(self, scratch_path, name):
+        """Atomically move a finished scratch file into the store; returns its path"""
+        path = self.get_path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size = os.path.getsize(scratch_path)
+        os.replace(scratch_path, path)
+
+        self.written += size
+        if self.written > self.quota_bytes * (1 - self.low_water) or \
+                time.time() - self.last_sweep > self.sweep_interval:
+            # The artifact is already in place; housekeeping must never fail the write
+            try:
+                self.sweep()
+            except Exception as e:
+                logger.error(f"Error sweeping artifacts: {str(e)}")
+        return path
+
+    def discard(self, path):
+        """Remove a scratch or stored file if it still exists; returns whether it was removed"""
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def iter_files(self):
+        """Yield os.DirEntry objects of every stored artifact"""
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or entry.path == self.scratch_dir:
+                    continue
+                if entry.is_dir():
+                    try:
+                        with os.scandir(entry.path) as shard:
+                            yield from (item for item in shard if item.is_file())
+                    except OSError:
+                        continue
+                elif entry.is_file():
+                    yield entry
+
+    def sweep(self):
+        """Drop expired artifacts and stale scratch files, then evict LRU until under quota
+
+        Returns the number of files removed; concurrent calls return 0 immediately.
+        """
+        if not self.lock.acquire(blocking=False):
+            return 0
+
+        try:
+            now = time.time()
+            self.written = 0
+            self.last_sweep = now
+            removed = 0
+
+            # Other threads and workers remove files concurrently, so any of them may vanish mid-scan
+            with os.scandir(self.scratch_dir) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_file() and now - entry.stat().st_mtime > self.scratch_ttl:
+                            removed += self.discard(entry.path)
+                    except OSError:
+                        continue
+
+            artifacts = []
+            for entry in self.iter_files():
+                try:
+                    stat = entry.stat()
+                    if now - stat.st_mtime > self.ttl:
+                        removed += self.discard(entry.path)
+                    else:
+                        artifacts.append((stat.st_atime, stat.st_size, entry.path))
+                except OSError:
+                    continue
+
+            total = sum(size for _, size, _ in artifacts)
+            if total > self.quota_bytes:
+                target = self.quota_bytes * self.low_water
+                for _, size, path in sorted(artifacts):
+                    if total <= target:
+                        break
+                    try:
+                        removed += self.discard(path)
+                    except OSError:
+                        continue
+                    total -= size
+
+            if removed:
+                logger.info(f"Artifact sweep removed {removed} files, {total} bytes in use")
+            return removed
+
+        finally:
+            self.lock.release()
@@ -30,18 +30,19 @@ def decode_from_sound(filename="broadcast.wav"):
     for i in range(0, len(data), chunk_size):
         chunk = data[i:i + chunk_size]
         if len(chunk) < chunk_size: break
-
-        yf = np.abs(np.fft.fft(chunk))
-        xf = np.fft.fftfreq(len(chunk), 1 / sr)
-        xf = xf[xf >= 0]
-        yf = yf[:len(xf)]
-
-        peaks, _ = find_peaks(yf, height=np.max(yf) * 0.5)
-        if len(peaks):
-            dom_freq = xf[peaks[np.argmax(yf[peaks])]]
-            decoded += freq_to_char(dom_freq)
-        else:
-            decoded += "?"
+        decoded += decode_chunk(chunk, sr)
 
     print(f"[✓] Decoded Message: {decoded}")
     return decoded
+
+def decode_chunk(chunk, sr=SAMPLE_RATE):
+    yf = np.abs(np.fft.fft(chunk))
+    xf = np.fft.fftfreq(len(chunk), 1 / sr)
+    xf = xf[xf >= 0]
+    yf = yf[:len(xf)]
+
+    peaks, _ = find_peaks(yf, height=np.max(yf) * 0.5)
+    if len(peaks):
+        dom_freq = xf[peaks[np.argmax(yf[peaks])]]
+        return freq_to_char(dom_freq)
+    return "?"
@@ -1,13 +1,18 @@
-import sounddevice as sd
+import threading
+import time
+import numpy as np
 import soundfile as sf
-from broadcast_core import decode_from_sound
+from broadcast_core import decode_from_sound, decode_chunk, DURATION
 
 SAMPLE_RATE = 44100
-DURATION = 5  # seconds
+DURATION_REC = 5  # seconds, for one-shot recordings
+BLOCK_SIZE = 1024  # samples delivered per source callback
+SILENCE_LEVEL = 0.02  # RMS (full scale = 1.0) below which a frame counts as silence
 
 def record_and_decode():
+    import sounddevice as sd
     print("[*] Recording from microphone for 5 seconds...")
-    audio = sd.rec(int(DURATION * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype='int16')
+    audio = sd.rec(int(DURATION_REC * SAMPLE_RATE), samplerate=SAMPLE_RATE, channels=1, dtype='int16')
     sd.wait()
     temp_wav = "mic_input.wav"
     sf.write(temp_wav, audio, SAMPLE_RATE)
@@ -15,5 +20,190 @@ def record_and_decode():
     print("[*] Decoding audio...")
     decode_from_sound(temp_wav)
 
+
+class RingBuffer:
+    """Fixed-size float32 ring buffer; one thread writes, another reads."""
+
+    def __init__(self, capacity):
+        self.data = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.write_pos = 0
+        self.read_pos = 0
+        self.dropped = 0
+        self.cond = threading.Condition()
+
+    def available(self):
+        return self.write_pos - self.read_pos
+
+    def write(self, samples):
+        samples = np.asarray(samples, dtype=np.float32).ravel()
+        with self.cond:
+            # Oldest unread samples are overwritten if the reader falls behind
+            overflow = self.available() + len(samples) - self.capacity
+            if overflow > 0:
+                self.read_pos += overflow
+                self.dropped += overflow
+            for part_start in range(0, len(samples), self.capacity):
+                part = samples[part_start:part_start + self.capacity]
+                start = self.write_pos % self.capacity
+                first = min(len(part), self.capacity - start)
+                self.data[start:start + first] = part[:first]
+                self.data[:len(part) - first] = part[first:]
+                self.write_pos += len(part)
+            self.cond.notify_all()
+
+    def wait_for(self, count, timeout=None):
+        with self.cond:
+            return self.cond.wait_for(lambda: self.available() >= count, timeout)
+
+    def read_into(self, out):
+        """Copy the next len(out) samples into out without allocating."""
+        with self.cond:
+            count = len(out)
+            start = self.read_pos % self.capacity
+            first = min(count, self.capacity - start)
+            out[:first] = self.data[start:start + first]
+            out[first:] = self.data[:count - first]
+            self.read_pos += count
+
+    def skip(self, count):
+        with self.cond:
+            self.read_pos += min(count, self.available())
+
+
+class MicrophoneSource:
+    """Live input through a sounddevice callback stream."""
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.stream = None
+
+    def start(self, callback):
+        import sounddevice as sd
+
+        def on_audio(indata, frames, time_info, status):
+            if status:
+                print(f"[!] {status}")
+            callback(indata[:, 0])
+
+        self.stream = sd.InputStream(samplerate=self.samplerate, blocksize=self.blocksize,
+                                     channels=1, dtype='float32', callback=on_audio)
+        self.stream.start()
+
+    def stop(self):
+        if self.stream is not None:
+            self.stream.stop()
+            self.stream.close()
+            self.stream = None
+
+
+class SyntheticSource:
+    """In-process source that plays a prepared signal through the same callback path."""
+
+    def __init__(self, audio, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, realtime=False):
+        audio = np.asarray(audio)
+        if audio.dtype == np.int16:
+            audio = audio.astype(np.float32) / 32768
+        self.audio = audio.astype(np.float32, copy=False)
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.realtime = realtime
+        self.thread = None
+        self.running = False
+        self.finished = threading.Event()
+
+    def start(self, callback):
+        def play():
+            for start in range(0, len(self.audio), self.blocksize):
+                if not self.running:
+                    break
+                callback(self.audio[start:start + self.blocksize])
+                if self.realtime:
+                    time.sleep(self.blocksize / self.samplerate)
+            self.finished.set()
+
+        self.running = True
+        self.thread = threading.Thread(target=play, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+
+
+class ContinuousListener:
+    """Decodes symbols from a live source with no fixed recording window or temp files."""
+
+    def __init__(self, source, on_symbol=None, samplerate=SAMPLE_RATE, buffer_seconds=10):
+        self.source = source
+        self.on_symbol = on_symbol or (lambda char: print(char, end="", flush=True))
+        self.samplerate = samplerate
+        self.chunk_size = int(samplerate * DURATION)
+        self.ring = RingBuffer(int(samplerate * buffer_seconds))
+        self.frame = np.zeros(self.chunk_size, dtype=np.float32)
+        self.in_message = False
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.source.start(self.ring.write)
+
+    def stop(self):
+        self.running = False
+        self.source.stop()
+
+    def process_available(self):
+        """Decode every complete frame currently buffered; returns the decoded text."""
+        decoded = ""
+        while self.ring.available() >= self.chunk_size:
+            self.ring.read_into(self.frame)
+            rms = np.sqrt(np.mean(np.square(self.frame)))
+
+            if rms < SILENCE_LEVEL:
+                if self.in_message:
+                    self.in_message = False
+                    decoded += self.emit("\n")
+                continue
+
+            if not self.in_message:
+                # Align the frame grid to the start of the message
+                onset = int(np.argmax(np.abs(self.frame) > SILENCE_LEVEL))
+                self.in_message = True
+                if onset > 0:
+                    keep = self.chunk_size - onset
+                    self.frame[:keep] = self.frame[onset:]
+                    if not self.ring.wait_for(onset, timeout=1.0):
+                        break
+                    self.ring.read_into(self.frame[keep:])
+
+            decoded += self.emit(decode_chunk(self.frame, self.samplerate))
+        return decoded
+
+    def emit(self, char):
+        self.on_symbol(char)
+        return char
+
+    def listen(self, timeout=None):
+        """Run until stopped (or the timeout expires), decoding as audio arrives."""
+        self.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while self.running and (deadline is None or time.monotonic() < deadline):
+                self.ring.wait_for(self.chunk_size, timeout=0.1)
+                self.process_available()
+                # Finite sources (e.g. SyntheticSource) signal when they have nothing more to play
+                finished = getattr(self.source, "finished", None)
+                if finished is not None and finished.is_set() and self.ring.available() < self.chunk_size:
+                    break
+        finally:
+            self.stop()
+
+
 if __name__ == "__main__":
-    record_and_decode()
+    print("[*] Listening on the microphone (Ctrl+C to stop)...")
+    try:
+        ContinuousListener(MicrophoneSource()).listen()
+    except KeyboardInterrupt:
+        print("\n[✓] Stopped")
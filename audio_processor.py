@@ -1,12 +1,99 @@
 import numpy as np
 import soundfile as sf
 from scipy.io.wavfile import write, read
-from scipy.signal import find_peaks
 import logging
+import multiprocessing
 import os
+import struct
+import threading
+import uuid
+import codecs
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from itertools import chain
+import preamble
+import fec
 
 logger = logging.getLogger(__name__)
 
+# Largest WAV file: the RIFF chunk size after the 8-byte chunk header is a uint32
+MAX_WAV_BYTES = 8 + 0xFFFFFFFF
+
+# AudioProcessor attribute holding the symbol duration of each modulation
+_SYMBOL_DURATION_ATTRIBUTES = {
+    'tone': 'duration',
+    'cpfsk': 'cpfsk_duration',
+    'mfsk': 'mfsk_duration',
+    'multicarrier': 'multicarrier_symbol_duration',
+    'quantized': 'quantized_duration'
+}
+
+
+def _get_symbol_duration_attribute(modulation, flags=0):
+    """AudioProcessor attribute holding the symbol duration of a transmission"""
+    if flags & preamble.FLAG_FEC:
+        return 'fec_duration'
+    return _SYMBOL_DURATION_ATTRIBUTES[modulation]
+
+
+# Pre-rendered symbol banks keyed by synthesis parameters, shared across requests
+_SYMBOL_BANK_CACHE = OrderedDict()
+_SYMBOL_BANK_CACHE_SIZE = 32
+_SYMBOL_BANK_CACHE_LOCK = threading.Lock()  # Request and job threads share the cache
+
+# Process pool for tiled synthesis, started on first use and shared by every request of this process
+_SYNTHESIS_POOL = None
+_SYNTHESIS_POOL_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=64)
+def _rfft_bin_frequencies(n_fft, sample_rate):
+    """Cached rfft bin centre frequencies for a frame length and sample rate"""
+    frequencies = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+    frequencies.setflags(write=False)
+    return frequencies
+
+
+@lru_cache(maxsize=32)
+def _candidate_basis(frame_size, sample_rate, frequencies):
+    """Cached cosine/sine correlation basis, shape (frame_size, 2 * len(frequencies))"""
+    n = np.arange(frame_size)[:, None]
+    phase = 2 * np.pi * n * np.asarray(frequencies)[None, :] / sample_rate
+    basis = np.concatenate([np.cos(phase), np.sin(phase)], axis=1).astype(np.float32)
+    basis.setflags(write=False)
+    return basis
+
+
+def _render_frequency_tile(processor, frequencies):
+    """Process-pool worker: PCM of one tile of tone-mode frequencies"""
+    return np.concatenate(list(processor.iter_frequency_blocks(frequencies, workers=1)))
+
+
+def _get_synthesis_pool(workers):
+    """Shared synthesis pool of `workers` processes, created on the first call
+    
+    Workers come from a forkserver (or spawn) context: forking the threaded web
+    server or a job thread directly can copy a held lock into the child and hang it.
+    """
+    global _SYNTHESIS_POOL
+    with _SYNTHESIS_POOL_LOCK:
+        if _SYNTHESIS_POOL is None:
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _SYNTHESIS_POOL = ProcessPoolExecutor(max_workers=workers,
+                                                  mp_context=multiprocessing.get_context(method))
+        return _SYNTHESIS_POOL
+
+
+def _reset_synthesis_pool(pool):
+    """Drop a broken pool so the next caller starts a fresh one"""
+    global _SYNTHESIS_POOL
+    with _SYNTHESIS_POOL_LOCK:
+        if _SYNTHESIS_POOL is pool:
+            _SYNTHESIS_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
 class AudioProcessor:
     def __init__(self):
         self.sample_rate = 44100
@@ -19,6 +106,50 @@ class AudioProcessor:
         self.amplitude = 0.7  # Higher amplitude for clearer signals
         self.fade_samples = int(self.sample_rate * 0.005)  # 5ms fade to prevent clicks
         
+        # Streaming synthesis writes PCM in blocks of roughly this many samples
+        self.block_size = 65536
+        
+        # Waveform pyramid: min/max/RMS per bucket, each level factor times coarser
+        self.pyramid_base = 64  # Samples per bucket at the finest level
+        self.pyramid_factor = 4
+        self.spectrum_frame = 4096  # Frame length of the averaged overview spectrum
+        
+        # Cached STFT spectrogram, quantized to uint8 dB and served as tiles
+        self.spectrogram_frame = 2048
+        self.spectrogram_hop = 512
+        self.spectrogram_floor_db = -100.0  # Maps to 0; full scale (0 dB) maps to 255
+        self.tile_frames = 256  # Time columns per tile
+        self.tile_bins = 128  # Frequency rows per tile
+        self.artifacts = None  # ArtifactStore to keep pyramids and spectrograms in; None keeps them beside the audio
+        
+        # Continuous-phase FSK text mode: no separators, timing recovered by the decoder
+        self.cpfsk_duration = 0.03  # Duration per character in seconds
+        
+        # M-ary multi-tone mode: one tone from each group per symbol, one byte per symbol
+        self.mfsk_groups = 2  # Simultaneous tones per symbol
+        self.mfsk_tones = 16  # Tones per group; mfsk_tones ** mfsk_groups must be 256
+        self.mfsk_duration = 0.03  # Duration per byte in seconds
+        
+        # Multi-carrier image mode: one pilot plus N orthogonal subcarriers per symbol
+        self.multicarrier_carriers = 32  # Pixels carried by each symbol
+        self.multicarrier_symbol_duration = 0.02  # 20ms symbols give 50Hz carrier spacing
+        
+        # Quantized image mode: one of `levels` widely spaced tones per run-length symbol
+        self.quantized_duration = 0.02  # Duration per symbol in seconds
+        
+        # Large tone-mode images are synthesized in tiles of this many pixels on a process pool
+        self.synthesis_tile = 1024
+        self.synthesis_workers = os.cpu_count() or 1
+        self.synthesis_parallel_min = 65536  # Fewer pixels than this are synthesized inline
+        
+        # Self-describing header: multi-tone bytes in the default band at a fixed rate
+        self.preamble_duration = 0.03  # Duration per header byte in seconds
+        self.preamble_search = 2.0  # Seconds of leading audio searched for the header
+        
+        # Reed-Solomon protected byte path settings
+        self.fec_duration = 0.01  # Multi-tone symbol duration when FEC absorbs misdetections
+        self.fec_erasure_ratio = 2.0  # Erase symbols whose winning tone is not this many times the runner-up
+        
     def char_to_freq(self, char, frequency_range=None):
         """Convert character to frequency within specified range"""
         if frequency_range is None:
@@ -31,6 +162,15 @@ class AudioProcessor:
         frequency = frequency_range['min'] + normalized * (frequency_range['max'] - frequency_range['min'])
         return frequency
     
+    def chars_to_freqs(self, text, frequency_range=None):
+        """Vectorized char_to_freq over a whole string"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.float64)
+        normalized = (codes - 32) / (126 - 32)
+        return frequency_range['min'] + normalized * (frequency_range['max'] - frequency_range['min'])
+    
     def freq_to_char(self, freq, frequency_range=None):
         """Convert frequency back to character"""
         if frequency_range is None:
@@ -38,10 +178,37 @@ class AudioProcessor:
         
         # Map frequency back to character
         normalized = (freq - frequency_range['min']) / (frequency_range['max'] - frequency_range['min'])
-        char_code = int(32 + normalized * (126 - 32))
+        char_code = int(round(32 + normalized * (126 - 32)))
         char_code = max(32, min(126, char_code))  # Clamp to valid range
         return chr(char_code)
     
+    def freqs_to_text(self, frequencies, frequency_range=None):
+        """Vectorized freq_to_char over an array of frequencies; 0 Hz (silence) becomes '?'"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        normalized = (frequencies - frequency_range['min']) / (frequency_range['max'] - frequency_range['min'])
+        codes = np.clip(np.rint(32 + normalized * (126 - 32)), 32, 126).astype(np.uint8)
+        codes[frequencies <= 0] = ord('?')
+        return codes.tobytes().decode('ascii')
+    
+    def get_text_alphabet(self, frequency_range=None):
+        """Frequencies of the 95 printable ASCII characters, in character order"""
+        return [self.char_to_freq(chr(code), frequency_range) for code in range(32, 127)]
+    
+    def get_text_band(self, frequency_range=None):
+        """Band occupied by character tones: the frequency range plus one character step"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        margin = (frequency_range['max'] - frequency_range['min']) / (126 - 32)
+        return (frequency_range['min'] - margin, frequency_range['max'] + margin)
+    
+    def indices_to_text(self, indices):
+        """Map alphabet indices (0-94) to characters; -1 (silence) becomes '?'"""
+        codes = np.where(indices >= 0, indices + 32, ord('?')).astype(np.uint8)
+        return codes.tobytes().decode('ascii')
+    
     def generate_tone(self, frequency, duration=None):
         """Generate a sine wave tone at specified frequency with enhanced AI compatibility"""
         if duration is None:
@@ -76,33 +243,159 @@ class AudioProcessor:
         separator = np.sin(2 * np.pi * self.separator_freq * t) * 0.3
         return (separator * 32767).astype(np.int16)
     
-    def encode_text_to_audio(self, text, output_file, frequency_range=None):
-        """Encode text string to audio file with AI-friendly format"""
+    def get_symbol_bank(self, frequency_range=None):
+        """Get the cached tone bank for printable ASCII characters plus the separator"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        
+        key = (float(frequency_range['min']), float(frequency_range['max']),
+               self.sample_rate, self.duration, self.amplitude, self.fade_samples,
+               self.separator_freq, self.separator_duration)
+        with _SYMBOL_BANK_CACHE_LOCK:
+            bank = _SYMBOL_BANK_CACHE.get(key)
+            if bank is not None:
+                _SYMBOL_BANK_CACHE.move_to_end(key)
+                return bank
+        
+        # One enveloped tone per printable character (ASCII 32-126), stored as float32 rows
+        tones = np.stack([
+            self.generate_tone(self.char_to_freq(chr(code), frequency_range))
+            for code in range(32, 127)
+        ]).astype(np.float32)
+        separator = self.generate_separator().astype(np.float32)
+        
+        bank = {
+            'tones': tones,
+            'peaks': np.max(np.abs(tones), axis=1),
+            'separator': separator,
+            'separator_peak': float(np.max(np.abs(separator))) if len(separator) else 0.0
+        }
+        # Built outside the lock; a concurrent build of the same key just replaces an equal bank
+        with _SYMBOL_BANK_CACHE_LOCK:
+            _SYMBOL_BANK_CACHE[key] = bank
+            _SYMBOL_BANK_CACHE.move_to_end(key)
+            if len(_SYMBOL_BANK_CACHE) > _SYMBOL_BANK_CACHE_SIZE:
+                _SYMBOL_BANK_CACHE.popitem(last=False)
+        return bank
+    
+    def write_blocks(self, blocks, output_file):
+        """Write a stream of int16 PCM blocks to a WAV file without holding the whole signal"""
+        with sf.SoundFile(output_file, 'w', samplerate=self.sample_rate, channels=1, subtype='PCM_16') as wav:
+            for block in blocks:
+                wav.write(block)
+    
+    def encode_blocks(self, blocks, output_file):
+        """Write prepared PCM blocks, such as a preamble followed by a payload, to a WAV file"""
         try:
-            if not text:
-                return False
+            self.write_blocks(blocks, output_file)
             
-            # Generate audio for each character with separators
-            audio_segments = []
-            separator = self.generate_separator()
+            logger.info(f"Successfully encoded audio: {output_file}")
+            return True
             
-            for i, char in enumerate(text):
-                freq = self.char_to_freq(char, frequency_range)
-                tone = self.generate_tone(freq)
-                audio_segments.append(tone)
-                
-                # Add separator between characters (except last one)
-                if i < len(text) - 1:
-                    audio_segments.append(separator)
+        except Exception as e:
+            logger.error(f"Error encoding audio: {str(e)}")
+            return False
+    
+    def wav_header(self, num_samples):
+        """Build a 44-byte mono 16-bit PCM WAV header for a known number of samples"""
+        data_size = num_samples * 2
+        return struct.pack(
+            '<4sI4s4sIHHIIHH4sI',
+            b'RIFF', 36 + data_size, b'WAVE',
+            b'fmt ', 16, 1, 1, self.sample_rate, self.sample_rate * 2, 2, 16,
+            b'data', data_size
+        )
+    
+    def count_wav_bytes(self, num_samples):
+        """Size of the mono 16-bit WAV file holding a number of samples"""
+        return 44 + num_samples * 2
+    
+    def iter_wav_bytes(self, blocks, num_samples, tee_file=None):
+        """Yield a WAV header followed by PCM block bytes, optionally teeing them to a file"""
+        tee = open(tee_file, 'wb') if tee_file else None
+        try:
+            chunk = self.wav_header(num_samples)
+            if tee:
+                tee.write(chunk)
+            yield chunk
             
-            # Concatenate all segments
-            audio_data = np.concatenate(audio_segments)
+            for block in blocks:
+                chunk = block.astype('<i2', copy=False).tobytes()
+                if tee:
+                    tee.write(chunk)
+                yield chunk
+        finally:
+            if tee:
+                tee.close()
+    
+    def count_text_samples(self, text):
+        """Number of samples encode_text_to_audio produces for a text"""
+        if not text:
+            return 0
+        tone_len = int(self.sample_rate * self.duration)
+        separator_len = int(self.sample_rate * self.separator_duration)
+        return len(text) * (tone_len + separator_len) - separator_len
+    
+    def count_frequency_samples(self, count):
+        """Number of samples encode_frequencies_to_audio produces for a number of tones"""
+        return count * int(self.sample_rate * self.duration)
+    
+    def iter_text_blocks(self, text, frequency_range=None):
+        """Yield int16 PCM blocks for text; the yielded buffer is reused between blocks"""
+        bank = self.get_symbol_bank(frequency_range)
+        tones = bank['tones']
+        separator = bank['separator']
+        tone_len = tones.shape[1]
+        stride = tone_len + len(separator)
+        
+        # Map characters to bank rows; anything outside printable ASCII is rendered on demand
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        printable = (codes >= 32) & (codes <= 126)
+        indices = np.where(printable, codes - 32, 0).astype(np.intp)
+        extra_positions = np.flatnonzero(~printable)
+        extra_tones = {
+            i: self.generate_tone(self.char_to_freq(text[i], frequency_range))
+            for i in extra_positions
+        }
+        
+        # The normalization peak is known from the bank before any samples are produced
+        peak = float(np.max(bank['peaks'][np.unique(indices[printable])])) if printable.any() else 0.0
+        for tone in extra_tones.values():
+            peak = max(peak, float(np.max(np.abs(tone))))
+        if len(codes) > 1:
+            peak = max(peak, bank['separator_peak'])
+        scale = 0.8 / peak * 32767
+        
+        # Each block holds a whole number of (tone + separator) symbols
+        symbols_per_block = max(1, self.block_size // stride)
+        frames = np.empty((symbols_per_block, stride), dtype=np.float32)
+        pcm = np.empty(symbols_per_block * stride, dtype=np.int16)
+        
+        for start in range(0, len(codes), symbols_per_block):
+            count = min(symbols_per_block, len(codes) - start)
+            block = frames[:count]
+            np.take(tones, indices[start:start + count], axis=0, out=block[:, :tone_len], mode='clip')
+            block[:, tone_len:] = separator
+            for i in extra_positions[(extra_positions >= start) & (extra_positions < start + count)]:
+                block[i - start, :tone_len] = extra_tones[i]
+            block *= scale
             
-            # Normalize audio to prevent clipping
-            audio_data = audio_data / np.max(np.abs(audio_data)) * 0.8
+            size = count * stride
+            # No separator after the last character
+            if start + count == len(codes):
+                size -= len(separator)
+            np.rint(block.reshape(-1)[:size], out=block.reshape(-1)[:size])
+            pcm[:size] = block.reshape(-1)[:size]
+            yield pcm[:size]
+    
+    def encode_text_to_audio(self, text, output_file, frequency_range=None):
+        """Encode text string to audio file with AI-friendly format"""
+        try:
+            if not text:
+                return False
             
-            # Save as WAV file
-            sf.write(output_file, audio_data, self.sample_rate)
+            # Stream symbol blocks straight into the WAV file
+            self.write_blocks(self.iter_text_blocks(text, frequency_range), output_file)
             
             logger.info(f"Successfully encoded text to audio: {output_file}")
             return True
@@ -111,45 +404,160 @@ class AudioProcessor:
             logger.error(f"Error encoding text to audio: {str(e)}")
             return False
     
-    def decode_audio_to_text(self, audio_file, frequency_range=None):
-        """Decode audio file back to text"""
-        try:
-            # Read audio file
-            audio_data, sample_rate = sf.read(audio_file)
+    def read_mono(self, audio_file, dtype='float64', start=0, stop=None):
+        """Read an audio file (or the samples from start to stop) as a mono float signal"""
+        audio_data, sample_rate = sf.read(audio_file, dtype=dtype, start=start, stop=stop)
+        
+        # Handle stereo audio
+        if len(audio_data.shape) > 1:
+            audio_data = audio_data[:, 0]
+        return audio_data, sample_rate
+    
+    def iter_frame_batches(self, audio_data, frame_size, hop=None, batch_frames=512):
+        """Yield (frames, frame_size) matrices of the signal as strided views, batch by batch
+        
+        Frames start every hop samples; a trailing frame is kept (zero-padded) when at
+        least half of it is present, matching the chunking of the original decoders.
+        """
+        if hop is None:
+            hop = frame_size
+        
+        total = len(audio_data)
+        full_frames = (total - frame_size) // hop + 1 if total >= frame_size else 0
+        windows = np.lib.stride_tricks.sliding_window_view(audio_data, frame_size)[::hop] if full_frames else None
+        
+        for start in range(0, full_frames, batch_frames):
+            yield windows[start:start + batch_frames]
+        
+        # Partial frames at the end of the signal
+        tail = []
+        offset = full_frames * hop
+        while total - offset >= frame_size // 2 and offset < total:
+            frame = np.zeros(frame_size, dtype=audio_data.dtype)
+            frame[:total - offset] = audio_data[offset:]
+            tail.append(frame)
+            offset += hop
+        if tail:
+            yield np.stack(tail)
+    
+    def detect_peak_frequencies(self, audio_data, sample_rate, frame_size, hop=None, band=None, bands=None):
+        """Dominant in-band frequency of every frame from batched real FFTs; 0 marks a silent frame
+        
+        With bands (a list of (low, high) pairs) one FFT per frame serves every band and
+        the result has one column per band.
+        """
+        bin_frequencies = _rfft_bin_frequencies(frame_size, sample_rate)
+        
+        # Restrict the search to the requested bands, never to DC or Nyquist
+        bin_ranges = []
+        for limits in (bands if bands is not None else [band]):
+            low, high = 1, len(bin_frequencies) - 1
+            if limits is not None:
+                low = max(low, int(np.searchsorted(bin_frequencies, limits[0])))
+                high = min(high, int(np.searchsorted(bin_frequencies, limits[1], side='right')))
+            bin_ranges.append((low, high))
+        bin_width = sample_rate / frame_size
+        
+        # Simultaneous lanes leak into each other's bands; a Hann window keeps them apart
+        window = np.hanning(frame_size).astype(np.float32) if bands is not None else None
+        
+        results = []
+        for frames in self.iter_frame_batches(audio_data, frame_size, hop):
+            if window is not None:
+                frames = frames * window
+            spectrum = np.abs(np.fft.rfft(frames, axis=1))
+            rows = np.arange(len(spectrum))
+            columns = []
             
-            # Handle stereo audio
-            if len(audio_data.shape) > 1:
-                audio_data = audio_data[:, 0]
+            for low, high in bin_ranges:
+                in_band = spectrum[:, low:high]
+                peak_bins = np.argmax(in_band, axis=1)
+                peak_values = in_band[rows, peak_bins]
+                
+                # Parabolic interpolation between neighbouring bins refines the peak position
+                absolute = peak_bins + low
+                left = spectrum[rows, absolute - 1]
+                right = spectrum[rows, absolute + 1]
+                curvature = left - 2 * peak_values + right
+                offset = np.divide(0.5 * (left - right), curvature, out=np.zeros_like(curvature), where=curvature < 0)
+                
+                peaks = (absolute + np.clip(offset, -0.5, 0.5)) * bin_width
+                peaks[peak_values <= 1e-6] = 0.0
+                columns.append(peaks)
             
-            # Calculate chunk size based on duration
+            results.append(np.stack(columns, axis=1) if bands is not None else columns[0])
+        
+        if not results:
+            return np.zeros((0, len(bin_ranges))) if bands is not None else np.zeros(0)
+        return np.concatenate(results)
+    
+    def iter_candidate_power(self, audio_data, sample_rate, frame_size, frequencies, hop=None):
+        """Yield (frames, candidates) power matrices at the candidate frequencies only
+        
+        Works like a Goertzel filter bank: the DTFT is evaluated only at the candidate
+        frequencies, for a whole batch of frames at once as one float32 matrix product.
+        """
+        basis = _candidate_basis(frame_size, sample_rate, tuple(float(f) for f in np.ravel(frequencies)))
+        count = basis.shape[1] // 2
+        
+        for frames in self.iter_frame_batches(audio_data, frame_size, hop):
+            projection = np.asarray(frames, dtype=np.float32) @ basis
+            yield projection[:, :count] ** 2 + projection[:, count:] ** 2
+    
+    def detect_alphabet_symbols(self, audio_data, sample_rate, frame_size, frequencies, hop=None):
+        """Index of the strongest candidate frequency in every frame; -1 marks a silent frame"""
+        results = []
+        for power in self.iter_candidate_power(audio_data, sample_rate, frame_size, frequencies, hop):
+            best = np.argmax(power, axis=1)
+            best[power[np.arange(len(best)), best] <= 1e-9] = -1
+            results.append(best)
+        
+        return np.concatenate(results) if results else np.zeros(0, dtype=np.intp)
+    
+    def detect_tone_groups(self, audio_data, sample_rate, frame_size, tone_groups, hop=None, confidence=False):
+        """Index of the strongest tone within each group for every frame, shape (frames, groups)
+        
+        With confidence=True also returns, per frame, how many times stronger the winning
+        tone is than the runner-up in the least clear-cut group.
+        """
+        tone_groups = np.asarray(tone_groups)
+        results = []
+        ratios = []
+        for power in self.iter_candidate_power(audio_data, sample_rate, frame_size, tone_groups, hop):
+            power = power.reshape(len(power), *tone_groups.shape)
+            results.append(np.argmax(power, axis=2))
+            if confidence:
+                top = np.sort(power, axis=2)[:, :, -2:]
+                ratios.append(np.min(top[:, :, 1] / np.maximum(top[:, :, 0], 1e-12), axis=1))
+        
+        digits = np.concatenate(results) if results else np.zeros((0, len(tone_groups)), dtype=np.intp)
+        if confidence:
+            return digits, np.concatenate(ratios) if ratios else np.zeros(0)
+        return digits
+    
+    def decode_audio_to_text(self, audio_file, frequency_range=None, backend='fft', start=0):
+        """Decode audio file back to text
+        
+        backend='fft' searches the spectrum of each chunk for its peak; backend='goertzel'
+        only evaluates the 95 character frequencies, which is cheaper on long recordings.
+        """
+        try:
+            if frequency_range is None:
+                frequency_range = {'min': 800, 'max': 3000}
+            
+            # Read audio file
+            audio_data, sample_rate = self.read_mono(audio_file, dtype='float32' if backend == 'goertzel' else 'float64',
+                                                     start=start)
             chunk_size = int(sample_rate * self.duration)
-            decoded_text = ""
             
-            # Process each chunk
-            for i in range(0, len(audio_data), chunk_size):
-                chunk = audio_data[i:i + chunk_size]
-                if len(chunk) < chunk_size // 2:  # Skip incomplete chunks
-                    break
-                
-                # Perform FFT to find dominant frequency
-                fft_data = np.abs(np.fft.fft(chunk))
-                frequencies = np.fft.fftfreq(len(chunk), 1 / sample_rate)
-                
-                # Only consider positive frequencies
-                positive_freq_mask = frequencies >= 0
-                fft_data = fft_data[positive_freq_mask]
-                frequencies = frequencies[positive_freq_mask]
-                
-                # Find peaks in the frequency spectrum
-                peaks, _ = find_peaks(fft_data, height=np.max(fft_data) * 0.3)
-                
-                if len(peaks) > 0:
-                    # Get the dominant frequency
-                    dominant_freq = frequencies[peaks[np.argmax(fft_data[peaks])]]
-                    char = self.freq_to_char(dominant_freq, frequency_range)
-                    decoded_text += char
-                else:
-                    decoded_text += "?"
+            if backend == 'goertzel':
+                alphabet = self.get_text_alphabet(frequency_range)
+                symbols = self.detect_alphabet_symbols(audio_data, sample_rate, chunk_size, alphabet)
+                decoded_text = self.indices_to_text(symbols)
+            else:
+                band = self.get_text_band(frequency_range)
+                peaks = self.detect_peak_frequencies(audio_data, sample_rate, chunk_size, band=band)
+                decoded_text = self.freqs_to_text(peaks, frequency_range)
             
             logger.info(f"Successfully decoded audio to text: {decoded_text}")
             return decoded_text
@@ -158,65 +566,102 @@ class AudioProcessor:
             logger.error(f"Error decoding audio to text: {str(e)}")
             return None
     
-    def decode_audio_to_frequencies(self, audio_file):
-        """Decode audio file to frequency data for image reconstruction"""
+    def decode_audio_to_frequencies(self, audio_file, frequency_range=None, bands=None, start=0):
+        """Decode audio file to frequency data for image reconstruction
+        
+        With bands (one (low, high) pair per lane, e.g. RGB channels) the result has
+        one column per band.
+        """
         try:
             # Read audio file
-            audio_data, sample_rate = sf.read(audio_file)
+            audio_data, sample_rate = self.read_mono(audio_file, start=start)
             
-            # Handle stereo audio
-            if len(audio_data.shape) > 1:
-                audio_data = audio_data[:, 0]
+            band = None
+            if frequency_range is not None:
+                band = (frequency_range['min'], frequency_range['max'])
             
-            # Calculate chunk size based on duration
             chunk_size = int(sample_rate * self.duration)
-            frequencies = []
-            
-            # Process each chunk
-            for i in range(0, len(audio_data), chunk_size):
-                chunk = audio_data[i:i + chunk_size]
-                if len(chunk) < chunk_size // 2:  # Skip incomplete chunks
-                    break
-                
-                # Perform FFT to find dominant frequency
-                fft_data = np.abs(np.fft.fft(chunk))
-                freq_bins = np.fft.fftfreq(len(chunk), 1 / sample_rate)
-                
-                # Only consider positive frequencies
-                positive_freq_mask = freq_bins >= 0
-                fft_data = fft_data[positive_freq_mask]
-                freq_bins = freq_bins[positive_freq_mask]
-                
-                # Find peaks in the frequency spectrum
-                peaks, _ = find_peaks(fft_data, height=np.max(fft_data) * 0.3)
-                
-                if len(peaks) > 0:
-                    # Get the dominant frequency
-                    dominant_freq = freq_bins[peaks[np.argmax(fft_data[peaks])]]
-                    frequencies.append(dominant_freq)
-                else:
-                    frequencies.append(0)  # Default frequency for silence
+            frequencies = self.detect_peak_frequencies(audio_data, sample_rate, chunk_size, band=band, bands=bands)
             
             logger.info(f"Successfully decoded {len(frequencies)} frequency values from audio")
             return frequencies
             
         except Exception as e:
             logger.error(f"Error decoding audio to frequencies: {str(e)}")
-            return []
+            return np.zeros(0)
+    
+    def iter_frequency_blocks(self, frequency_data, workers=None):
+        """Yield int16 PCM blocks with one tone per frequency value
+        
+        A 2D (values, lanes) array sends each row as simultaneous tones, one per lane,
+        sharing the amplitude of a single tone. Inputs of at least synthesis_parallel_min
+        values are synthesized tile by tile on the shared process pool, keeping up to
+        two tiles per worker (`workers`, default synthesis_workers) in flight.
+        """
+        if workers is None:
+            workers = self.synthesis_workers
+        if workers > 1 and len(frequency_data) >= self.synthesis_parallel_min:
+            yield from self.iter_frequency_tiles(frequency_data, workers)
+            return
+        
+        samples = int(self.sample_rate * self.duration)
+        t = np.linspace(0, self.duration, samples, endpoint=False)
+        
+        # Same envelope as generate_tone, shared by every tone in the block
+        envelope = np.full(samples, self.amplitude * 32767)
+        if self.fade_samples > 0:
+            envelope[:self.fade_samples] *= np.linspace(0, 1, self.fade_samples)
+            envelope[-self.fade_samples:] *= np.linspace(1, 0, self.fade_samples)
+        
+        frequencies = np.asarray(frequency_data, dtype=np.float64)
+        tones_per_block = max(1, self.block_size // samples)
+        
+        if frequencies.ndim == 2:
+            envelope = envelope / frequencies.shape[1]
+        
+        for start in range(0, len(frequencies), tones_per_block):
+            block = frequencies[start:start + tones_per_block]
+            if block.ndim == 2:
+                tones = np.sin(2 * np.pi * block[:, :, None] * t).sum(axis=1) * envelope
+            else:
+                tones = np.sin(2 * np.pi * block[:, None] * t) * envelope
+            yield tones.astype(np.int16).ravel()
+    
+    def iter_frequency_tiles(self, frequency_data, workers):
+        """Synthesize tiles of tone-mode values in parallel, yielding their PCM in order
+        
+        Every tone starts from zero phase, so tiles are independent and stitch exactly.
+        At most two tiles per worker are in flight, which bounds memory on large images.
+        """
+        frequencies = np.asarray(frequency_data, dtype=np.float64)
+        starts = range(0, len(frequencies), self.synthesis_tile)
+        pending = deque()
+        
+        pool = _get_synthesis_pool(workers)
+        try:
+            for start in starts:
+                tile = frequencies[start:start + self.synthesis_tile]
+                pending.append(pool.submit(_render_frequency_tile, self, tile))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        except BrokenProcessPool:
+            _reset_synthesis_pool(pool)
+            raise
+        finally:
+            # The pool outlives this call; only drop the tiles nobody will read
+            for future in pending:
+                future.cancel()
     
     def encode_frequencies_to_audio(self, frequency_data, output_file):
         """Encode frequency data to audio file"""
         try:
-            audio_segments = []
-            for freq in frequency_data:
-                tone = self.generate_tone(freq)
-                audio_segments.append(tone)
-            
-            # Concatenate all segments
-            audio_data = np.concatenate(audio_segments)
+            if len(frequency_data) == 0:
+                raise ValueError("No frequency data to encode")
             
-            # Save as WAV file
-            sf.write(output_file, audio_data, self.sample_rate)
+            # Stream tone blocks straight into the WAV file
+            self.write_blocks(self.iter_frequency_blocks(frequency_data), output_file)
             
             logger.info(f"Successfully encoded frequencies to audio: {output_file}")
             return True
@@ -225,54 +670,1056 @@ class AudioProcessor:
             logger.error(f"Error encoding frequencies to audio: {str(e)}")
             return False
     
-    def get_visualization_data(self, audio_file):
-        """Get waveform and spectrum data for visualization"""
+    def get_multicarrier_layout(self, frequency_range=None, sample_rate=None):
+        """Get symbol length, subcarrier FFT bins and phases for multi-carrier encoding"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        if sample_rate is None:
+            sample_rate = self.sample_rate
+        
+        symbol_samples = int(round(sample_rate * self.multicarrier_symbol_duration))
+        spacing = sample_rate / symbol_samples
+        
+        # Carriers sit exactly on FFT bins so they stay orthogonal over one symbol;
+        # bin 0 of the layout is a full-scale pilot used as the amplitude reference
+        first_bin = max(1, int(round(frequency_range['min'] / spacing)))
+        bins = first_bin + np.arange(self.multicarrier_carriers + 1)
+        if bins[-1] >= symbol_samples // 2:
+            raise ValueError("Too many subcarriers for the symbol duration and sample rate")
+        
+        # Quadratic (Newman) phases keep the peak-to-average ratio of the sum low
+        k = np.arange(len(bins))
+        phases = np.pi * k * k / len(bins)
+        
+        return {
+            'symbol_samples': symbol_samples,
+            'spacing': spacing,
+            'bins': bins,
+            'phases': phases
+        }
+    
+    def iter_multicarrier_blocks(self, frequency_data, frequency_range=None):
+        """Yield int16 PCM blocks of multi-carrier symbols"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        
+        layout = self.get_multicarrier_layout(frequency_range)
+        carriers = self.multicarrier_carriers
+        symbol_samples = layout['symbol_samples']
+        carrier_weights = np.exp(1j * layout['phases']) * (symbol_samples / 2)
+        
+        # Scale so the worst case (every carrier at full amplitude and in phase) cannot clip
+        scale = 0.8 / (carriers + 1) * 32767
+        
+        # Pixel frequencies become subcarrier amplitudes in [0, 1]
+        values = np.asarray(frequency_data, dtype=np.float64)
+        values = np.clip((values - frequency_range['min']) / (frequency_range['max'] - frequency_range['min']), 0, 1)
+        
+        symbols_per_block = max(1, self.block_size // symbol_samples)
+        spectrum = np.zeros((symbols_per_block, symbol_samples // 2 + 1), dtype=np.complex128)
+        amplitudes = np.empty((symbols_per_block, carriers + 1))
+        
+        for start in range(0, len(values), symbols_per_block * carriers):
+            chunk = values[start:start + symbols_per_block * carriers]
+            symbols = -(-len(chunk) // carriers)
+            
+            amplitudes[:symbols, 0] = 1.0
+            amplitudes[:symbols, 1:] = 0.0
+            amplitudes[:symbols, 1:].flat[:len(chunk)] = chunk
+            
+            # Build each symbol's spectrum and synthesize the block with one inverse FFT
+            spectrum[:symbols, layout['bins']] = amplitudes[:symbols] * carrier_weights
+            audio_data = np.fft.irfft(spectrum[:symbols], n=symbol_samples, axis=1)
+            yield np.rint(audio_data * scale).astype(np.int16).ravel()
+    
+    def count_multicarrier_samples(self, count, frequency_range=None):
+        """Number of samples encode_frequencies_multicarrier produces for a number of pixels"""
+        layout = self.get_multicarrier_layout(frequency_range)
+        return -(-count // self.multicarrier_carriers) * layout['symbol_samples']
+    
+    def encode_frequencies_multicarrier(self, frequency_data, output_file, frequency_range=None):
+        """Encode frequency data to audio carrying several pixels per symbol on orthogonal subcarriers"""
+        try:
+            if len(frequency_data) == 0:
+                raise ValueError("No frequency data to encode")
+            
+            # Stream symbol blocks straight into the WAV file
+            self.write_blocks(self.iter_multicarrier_blocks(frequency_data, frequency_range), output_file)
+            
+            logger.info(f"Successfully encoded {len(frequency_data)} frequencies to multi-carrier audio: {output_file}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error encoding frequencies to multi-carrier audio: {str(e)}")
+            return False
+    
+    def multicarrier_frequencies(self, audio_data, sample_rate, frequency_range=None):
+        """Pixel frequencies carried by the symbols of a symbol-aligned multi-carrier signal"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        
+        layout = self.get_multicarrier_layout(frequency_range, sample_rate)
+        results = []
+        
+        # All subcarriers of a batch of symbols from one batched FFT
+        for frames in self.iter_frame_batches(audio_data, layout['symbol_samples']):
+            magnitudes = np.abs(np.fft.rfft(frames, axis=1)[:, layout['bins']])
+            pilot = magnitudes[:, :1]
+            values = np.divide(magnitudes[:, 1:], pilot, out=np.zeros_like(magnitudes[:, 1:]), where=pilot > 1e-9)
+            results.append(np.clip(values, 0, 1).ravel())
+        
+        values = np.concatenate(results) if results else np.zeros(0)
+        return frequency_range['min'] + values * (frequency_range['max'] - frequency_range['min'])
+    
+    def decode_audio_multicarrier(self, audio_file, frequency_range=None, start=0):
+        """Decode multi-carrier audio back to frequency data using one FFT per symbol"""
+        try:
+            # Read audio file
+            audio_data, sample_rate = self.read_mono(audio_file, start=start)
+            
+            frequencies = self.multicarrier_frequencies(audio_data, sample_rate, frequency_range)
+            
+            logger.info(f"Successfully decoded {len(frequencies)} frequency values from multi-carrier audio")
+            return frequencies
+            
+        except Exception as e:
+            logger.error(f"Error decoding multi-carrier audio: {str(e)}")
+            return np.zeros(0)
+    
+    def count_cpfsk_samples(self, text):
+        """Number of samples encode_text_cpfsk produces for a text"""
+        return len(text) * int(round(self.sample_rate * self.cpfsk_duration))
+    
+    def iter_fsk_blocks(self, frequencies, symbol_duration):
+        """Yield int16 PCM blocks of continuous-phase FSK
+        
+        frequencies has one row per symbol; a 2D array sends several tones (lanes) at
+        once, each lane keeping its own continuous phase.
+        """
+        symbol_samples = int(round(self.sample_rate * symbol_duration))
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        if frequencies.ndim == 1:
+            frequencies = frequencies[:, None]
+        lanes = frequencies.shape[1]
+        symbols_per_block = max(1, self.block_size // symbol_samples)
+        scale = 0.8 / lanes * 32767
+        phase = np.zeros(lanes)
+        
+        for start in range(0, len(frequencies), symbols_per_block):
+            block = frequencies[start:start + symbols_per_block]
+            
+            # Integrate instantaneous frequency so the phase never jumps between symbols
+            phase_steps = np.repeat(block * (2 * np.pi / self.sample_rate), symbol_samples, axis=0)
+            phases = phase + np.cumsum(phase_steps, axis=0) - phase_steps
+            phase = (phases[-1] + phase_steps[-1]) % (2 * np.pi)
+            audio_data = np.sin(phases).sum(axis=1) * scale
+            
+            # Fade only the ends of the whole transmission
+            if self.fade_samples > 0:
+                if start == 0:
+                    audio_data[:self.fade_samples] *= np.linspace(0, 1, self.fade_samples)
+                if start + len(block) == len(frequencies):
+                    audio_data[-self.fade_samples:] *= np.linspace(1, 0, self.fade_samples)
+            
+            yield np.rint(audio_data).astype(np.int16)
+    
+    def iter_cpfsk_blocks(self, text, frequency_range=None):
+        """Yield int16 PCM blocks of continuous-phase FSK with one symbol per character"""
+        return self.iter_fsk_blocks(self.chars_to_freqs(text, frequency_range), self.cpfsk_duration)
+    
+    def encode_text_cpfsk(self, text, output_file, frequency_range=None):
+        """Encode text as separator-free continuous-phase FSK"""
+        try:
+            if not text:
+                return False
+            
+            # Stream symbol blocks straight into the WAV file
+            self.write_blocks(self.iter_cpfsk_blocks(text, frequency_range), output_file)
+            
+            logger.info(f"Successfully encoded text to CPFSK audio: {output_file}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error encoding text to CPFSK audio: {str(e)}")
+            return False
+    
+    def estimate_symbol_timing(self, audio_data, sample_rate, symbol_samples, frequencies, max_symbols=64):
+        """Find where the first symbol starts and how many symbols follow
+        
+        Frames that straddle a tone transition split their energy between two candidate
+        frequencies, so the symbol boundary is the frame offset that maximizes the
+        strongest candidate's power summed over the first max_symbols symbols.
+        """
+        # Locate the transmission from a short-time RMS envelope; CPFSK has a constant envelope
+        hop = max(1, symbol_samples // 4)
+        blocks = len(audio_data) // hop
+        if blocks == 0:
+            return 0, 0
+        rms = np.sqrt(np.mean(np.square(audio_data[:blocks * hop].reshape(blocks, hop), dtype=np.float64), axis=1))
+        if np.max(rms) <= 1e-6:
+            return 0, 0
+        active = np.flatnonzero(rms > 0.5 * np.max(rms))
+        onset, end = int(active[0]) * hop, (int(active[-1]) + 1) * hop
+        
+        basis = _candidate_basis(symbol_samples, sample_rate, tuple(float(f) for f in frequencies))
+        count = len(frequencies)
+        span = min(max_symbols, max(1, (end - onset) // symbol_samples))
+        
+        def concentration(offset):
+            segment = audio_data[offset:offset + span * symbol_samples]
+            frames = segment[:len(segment) // symbol_samples * symbol_samples].reshape(-1, symbol_samples)
+            projection = np.asarray(frames, dtype=np.float32) @ basis
+            power = projection[:, :count] ** 2 + projection[:, count:] ** 2
+            return float(np.sum(np.max(power, axis=1)))
+        
+        # Coarse search around the energy onset, then a fine search around the best coarse offset
+        best = onset
+        for step, radius in ((max(1, symbol_samples // 16), symbol_samples // 2),
+                             (max(1, symbol_samples // 256), symbol_samples // 16)):
+            offsets = range(max(0, best - radius), min(len(audio_data) - symbol_samples, best + radius) + 1, step)
+            best = max(offsets, key=concentration, default=best)
+        
+        symbols = int(round((end - best) / symbol_samples))
+        return best, symbols
+    
+    def decode_audio_cpfsk(self, audio_file, frequency_range=None, start=0):
+        """Decode continuous-phase FSK audio back to text with symbol timing recovery"""
         try:
+            if frequency_range is None:
+                frequency_range = {'min': 800, 'max': 3000}
+            
             # Read audio file
-            audio_data, sample_rate = sf.read(audio_file)
+            audio_data, sample_rate = self.read_mono(audio_file, dtype='float32', start=start)
+            symbol_samples = int(round(sample_rate * self.cpfsk_duration))
+            alphabet = self.get_text_alphabet(frequency_range)
+            
+            offset, symbols = self.estimate_symbol_timing(audio_data, sample_rate, symbol_samples, alphabet)
+            aligned = audio_data[offset:offset + symbols * symbol_samples]
+            
+            indices = self.detect_alphabet_symbols(aligned, sample_rate, symbol_samples, alphabet)
+            decoded_text = self.indices_to_text(indices)
+            
+            logger.info(f"Successfully decoded CPFSK audio to text: {decoded_text}")
+            return decoded_text
+            
+        except Exception as e:
+            logger.error(f"Error decoding CPFSK audio to text: {str(e)}")
+            return None
+    
+    def get_mfsk_tone_groups(self, frequency_range=None):
+        """Tone frequencies for multi-tone symbols, shape (groups, tones), evenly spread over the range"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        if self.mfsk_tones ** self.mfsk_groups != 256:
+            raise ValueError("mfsk_tones ** mfsk_groups must equal 256 to carry one byte per symbol")
+        
+        count = self.mfsk_groups * self.mfsk_tones
+        tones = np.linspace(frequency_range['min'], frequency_range['max'], count)
+        return tones.reshape(self.mfsk_groups, self.mfsk_tones)
+    
+    def count_mfsk_samples(self, num_bytes):
+        """Number of samples encode_bytes_to_audio produces for a payload size"""
+        return num_bytes * int(round(self.sample_rate * self.mfsk_duration))
+    
+    def iter_mfsk_blocks(self, data, frequency_range=None, symbol_duration=None):
+        """Yield int16 PCM blocks sending one byte per symbol as simultaneous tones"""
+        tone_groups = self.get_mfsk_tone_groups(frequency_range)
+        values = np.frombuffer(bytes(data), dtype=np.uint8).astype(np.intp)
+        
+        # Group g carries base-mfsk_tones digit g of the byte, least significant first
+        digits = (values[:, None] // self.mfsk_tones ** np.arange(self.mfsk_groups)) % self.mfsk_tones
+        frequencies = tone_groups[np.arange(self.mfsk_groups), digits]
+        return self.iter_fsk_blocks(frequencies, symbol_duration or self.mfsk_duration)
+    
+    def encode_bytes_to_audio(self, data, output_file, frequency_range=None):
+        """Encode arbitrary bytes to audio with one multi-tone symbol per byte"""
+        try:
+            if not data:
+                return False
+            
+            # Stream symbol blocks straight into the WAV file
+            self.write_blocks(self.iter_mfsk_blocks(data, frequency_range), output_file)
+            
+            logger.info(f"Successfully encoded {len(data)} bytes to multi-tone audio: {output_file}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error encoding bytes to multi-tone audio: {str(e)}")
+            return False
+    
+    def decode_audio_to_bytes(self, audio_file, frequency_range=None, start=0):
+        """Decode multi-tone audio back to bytes with symbol timing recovery"""
+        try:
+            # Read audio file
+            audio_data, sample_rate = self.read_mono(audio_file, dtype='float32', start=start)
+            symbol_samples = int(round(sample_rate * self.mfsk_duration))
+            tone_groups = self.get_mfsk_tone_groups(frequency_range)
+            
+            offset, symbols = self.estimate_symbol_timing(audio_data, sample_rate, symbol_samples, tone_groups.ravel())
+            aligned = audio_data[offset:offset + symbols * symbol_samples]
+            
+            # Recombine the per-group digits into bytes
+            digits = self.detect_tone_groups(aligned, sample_rate, symbol_samples, tone_groups)
+            values = digits @ (self.mfsk_tones ** np.arange(self.mfsk_groups))
+            data = values.astype(np.uint8).tobytes()
+            
+            logger.info(f"Successfully decoded {len(data)} bytes from multi-tone audio")
+            return data
+            
+        except Exception as e:
+            logger.error(f"Error decoding multi-tone audio to bytes: {str(e)}")
+            return None
+    
+    def count_fec_samples(self, num_bytes):
+        """Number of samples iter_fec_blocks produces for a payload size"""
+        return fec.encoded_length(num_bytes) * int(round(self.sample_rate * self.fec_duration))
+    
+    def iter_fec_blocks(self, data, frequency_range=None):
+        """Yield int16 PCM blocks of Reed-Solomon coded, interleaved multi-tone symbols
+        
+        The symbols are fec_duration long, shorter than plain multi-tone ones since the
+        parity absorbs the extra misdetections.
+        """
+        return self.iter_mfsk_blocks(fec.encode(data), frequency_range, symbol_duration=self.fec_duration)
+    
+    def decode_audio_fec(self, audio_file, length, frequency_range=None, start=0):
+        """Decode Reed-Solomon protected multi-tone audio back to `length` payload bytes
+        
+        Symbols whose tones barely stand out from the runner-up are handed to the
+        decoder as erasures, which cost half as much parity as unknown errors.
+        """
+        try:
+            # Read audio file
+            audio_data, sample_rate = self.read_mono(audio_file, dtype='float32', start=start)
+            symbol_samples = int(round(sample_rate * self.fec_duration))
+            tone_groups = self.get_mfsk_tone_groups(frequency_range)
+            
+            # Behind a preamble the payload start is already exact; short symbols make a fresh search fragile
+            if start:
+                offset, symbols = 0, len(audio_data) // symbol_samples
+            else:
+                offset, symbols = self.estimate_symbol_timing(audio_data, sample_rate, symbol_samples,
+                                                              tone_groups.ravel())
+            symbols = min(symbols, fec.encoded_length(length))
+            aligned = audio_data[offset:offset + symbols * symbol_samples]
             
-            # Handle stereo audio
-            if len(audio_data.shape) > 1:
-                audio_data = audio_data[:, 0]
+            digits, confidence = self.detect_tone_groups(aligned, sample_rate, symbol_samples, tone_groups,
+                                                         confidence=True)
+            values = digits @ (self.mfsk_tones ** np.arange(self.mfsk_groups))
+            erasures = np.flatnonzero(confidence < self.fec_erasure_ratio)
+            data, corrected, failed = fec.decode(values.astype(np.uint8).tobytes(), length, erasures=erasures,
+                                                 confidence=confidence)
             
-            # Calculate time axis
-            duration = len(audio_data) / sample_rate
-            time_axis = np.linspace(0, duration, len(audio_data))
+            logger.info(f"Successfully decoded {len(data)} FEC bytes ({corrected} codewords corrected, "
+                        f"{failed} uncorrectable)")
+            return data
             
-            # Downsample for visualization if needed
-            max_points = 2000
-            if len(audio_data) > max_points:
-                step = len(audio_data) // max_points
-                audio_data = audio_data[::step]
-                time_axis = time_axis[::step]
+        except Exception as e:
+            logger.error(f"Error decoding FEC multi-tone audio: {str(e)}")
+            return None
+    
+    def encode_text_mfsk(self, text, output_file, frequency_range=None):
+        """Encode text as UTF-8 bytes with one multi-tone symbol per byte"""
+        return self.encode_bytes_to_audio(text.encode('utf-8'), output_file, frequency_range)
+    
+    def decode_audio_mfsk(self, audio_file, frequency_range=None, start=0):
+        """Decode multi-tone audio back to UTF-8 text"""
+        data = self.decode_audio_to_bytes(audio_file, frequency_range, start)
+        if data is None:
+            return None
+        return data.decode('utf-8', errors='replace')
+    
+    def get_quantized_tones(self, levels, frequency_range=None):
+        """Tone frequencies of the L-ary alphabet used for quantized image symbols"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        return np.linspace(frequency_range['min'], frequency_range['max'], levels)
+    
+    def count_quantized_samples(self, count):
+        """Number of samples iter_quantized_blocks produces for a symbol count"""
+        return count * int(round(self.sample_rate * self.quantized_duration))
+    
+    def iter_quantized_blocks(self, symbols, levels, frequency_range=None):
+        """Yield int16 PCM blocks of continuous-phase FSK over the quantized symbol alphabet"""
+        tones = self.get_quantized_tones(levels, frequency_range)
+        return self.iter_fsk_blocks(tones[np.asarray(symbols, dtype=np.intp)], self.quantized_duration)
+    
+    def decode_audio_quantized(self, audio_file, levels, frequency_range=None, start=0):
+        """Decode quantized image audio back to its symbols with symbol timing recovery"""
+        try:
+            # Read audio file
+            audio_data, sample_rate = self.read_mono(audio_file, dtype='float32', start=start)
+            symbol_samples = int(round(sample_rate * self.quantized_duration))
+            tones = self.get_quantized_tones(levels, frequency_range)
+            
+            offset, symbols = self.estimate_symbol_timing(audio_data, sample_rate, symbol_samples, tones)
+            aligned = audio_data[offset:offset + symbols * symbol_samples]
+            indices = self.detect_alphabet_symbols(aligned, sample_rate, symbol_samples, tones)
+            
+            logger.info(f"Successfully decoded {len(indices)} quantized symbols from audio")
+            return np.clip(indices, 0, levels - 1).astype(np.uint8)
+            
+        except Exception as e:
+            logger.error(f"Error decoding quantized audio: {str(e)}")
+            return np.zeros(0, dtype=np.uint8)
+    
+    def iter_decode_audio(self, audio_file, mode='text', modulation='tone', frequency_range=None, backend='fft',
+                          start=0):
+        """Decode an audio file block by block, yielding results as soon as they are decodable
+        
+        Memory stays bounded by the block size no matter how long the file is. Text
+        modes yield str pieces, image modes yield arrays of pixel frequencies.
+        """
+        decoder = StreamDecoder(self, sf.info(audio_file).samplerate, mode=mode, modulation=modulation,
+                                frequency_range=frequency_range, backend=backend)
+        
+        for block in sf.blocks(audio_file, blocksize=self.block_size, dtype='float32', start=start):
+            piece = decoder.feed(block)
+            if len(piece):
+                yield piece
+        
+        piece = decoder.flush()
+        if len(piece):
+            yield piece
+    
+    def build_preamble(self, mode, modulation, frequency_range, payload_length, width=0, height=0, flags=0):
+        """Header bytes describing a transmission made with this processor's settings"""
+        if frequency_range is None:
+            frequency_range = {'min': 800, 'max': 3000}
+        symbol_duration = getattr(self, _get_symbol_duration_attribute(modulation, flags))
+        return preamble.pack_header(mode, modulation, symbol_duration, frequency_range, payload_length,
+                                    width, height, flags)
+    
+    def count_preamble_samples(self, sample_rate=None):
+        """Number of samples the header occupies"""
+        return preamble.HEADER_SIZE * int(round((sample_rate or self.sample_rate) * self.preamble_duration))
+    
+    def with_preamble(self, header, blocks, num_samples):
+        """Prefix payload blocks with the multi-tone header; returns (blocks, num_samples)"""
+        header_blocks = self.iter_mfsk_blocks(header, symbol_duration=self.preamble_duration)
+        return chain(header_blocks, blocks), num_samples + self.count_preamble_samples()
+    
+    def parse_preamble(self, audio_data, sample_rate):
+        """Find and decode the header at the start of a signal
+        
+        Returns (fields, sample where the payload starts), or (None, 0) when the signal
+        does not begin with an intact header.
+        """
+        symbol_samples = int(round(sample_rate * self.preamble_duration))
+        tone_groups = self.get_mfsk_tone_groups()
+        
+        offset, _ = self.estimate_symbol_timing(audio_data, sample_rate, symbol_samples, tone_groups.ravel(),
+                                                max_symbols=preamble.HEADER_SIZE)
+        end = offset + preamble.HEADER_SIZE * symbol_samples
+        if end > len(audio_data):
+            return None, 0
+        
+        digits = self.detect_tone_groups(audio_data[offset:end], sample_rate, symbol_samples, tone_groups)
+        data = (digits @ (self.mfsk_tones ** np.arange(self.mfsk_groups))).astype(np.uint8).tobytes()
+        try:
+            fields = preamble.unpack_header(data)
+        except ValueError:
+            return None, 0
+        
+        if sample_rate == self.sample_rate:
+            # The decoded bytes give the exact header waveform; matching it pins the payload start to the sample
+            reference = np.concatenate(list(self.iter_mfsk_blocks(data, symbol_duration=self.preamble_duration)))
+            radius = symbol_samples // 8
+            low = max(0, offset - radius)
+            segment = audio_data[low:min(len(audio_data), offset + radius + len(reference))]
+            if len(segment) >= len(reference):
+                scores = np.correlate(segment, reference.astype(np.float32), mode='valid')
+                offset = low + int(np.argmax(scores))
+        
+        return fields, offset + preamble.HEADER_SIZE * symbol_samples
+    
+    def read_preamble(self, audio_file):
+        """Header of an audio file and the sample where its payload starts, or (None, 0)"""
+        try:
+            sample_rate = sf.info(audio_file).samplerate
+            stop = int(sample_rate * self.preamble_search) + self.count_preamble_samples(sample_rate)
+            audio_data, sample_rate = self.read_mono(audio_file, dtype='float32', stop=stop)
+            return self.parse_preamble(audio_data, sample_rate)
+        
+        except Exception as e:
+            logger.error(f"Error reading preamble: {str(e)}")
+            return None, 0
+    
+    def apply_preamble(self, fields):
+        """Adopt the symbol duration announced by a header"""
+        setattr(self, _get_symbol_duration_attribute(fields['modulation'], fields['flags']), fields['symbol_duration'])
+    
+    def get_side_file_path(self, audio_file, suffix):
+        """Location of a file derived from an audio file, in the artifact store when one is set"""
+        if self.artifacts is None:
+            return f"{audio_file}.{suffix}"
+        name = f"{os.path.basename(audio_file)}.{suffix}"
+        return self.artifacts.locate(name) or self.artifacts.get_path(name)
+    
+    def get_pyramid_path(self, audio_file):
+        """Location of the waveform pyramid stored for an audio file"""
+        return self.get_side_file_path(audio_file, 'pyramid.npz')
+    
+    def get_scratch_path(self, path):
+        """Private path to build a side file in before commit_side_file moves it to `path`"""
+        if self.artifacts is not None:
+            return self.artifacts.scratch_path(os.path.basename(path))
+        return f"{path}.{uuid.uuid4().hex}.tmp"
+    
+    def commit_side_file(self, scratch_path, path):
+        """Atomically move a finished side file into place, so readers never see a partial one"""
+        if self.artifacts is not None:
+            self.artifacts.commit(scratch_path, os.path.basename(path))
+        else:
+            os.replace(scratch_path, path)
+    
+    def discard_side_file(self, scratch_path):
+        """Remove the scratch file of a build that failed"""
+        if os.path.exists(scratch_path):
+            os.remove(scratch_path)
+    
+    def build_waveform_pyramid(self, audio_file):
+        """Build the min/max/RMS envelope pyramid and overview spectrum in one pass over the file"""
+        info = sf.info(audio_file)
+        base = self.pyramid_base
+        frame = self.spectrum_frame
+        window = np.hanning(frame).astype(np.float32)
+        
+        mins, maxs, sumsq = [], [], []
+        spectrum = np.zeros(frame // 2 + 1)
+        spectrum_frames = 0
+        
+        # Blocks are whole multiples of both the bucket and the spectrum frame
+        block_size = base * frame
+        for data in sf.blocks(audio_file, blocksize=block_size, dtype='float32'):
+            if data.ndim > 1:
+                data = data[:, 0]
             
-            # Calculate frequency spectrum
-            fft_data = np.abs(np.fft.fft(audio_data))
-            frequencies = np.fft.fftfreq(len(audio_data), 1 / sample_rate)
+            buckets = -(-len(data) // base)
+            padded = np.zeros(buckets * base, dtype=np.float32)
+            padded[:len(data)] = data
+            rows = padded.reshape(buckets, base)
             
-            # Only keep positive frequencies
-            positive_freq_mask = frequencies >= 0
-            fft_data = fft_data[positive_freq_mask]
-            frequencies = frequencies[positive_freq_mask]
+            # Padding must not leak into the last bucket's min/max
+            last = data[(buckets - 1) * base:]
+            block_min = rows.min(axis=1)
+            block_max = rows.max(axis=1)
+            block_min[-1], block_max[-1] = last.min(), last.max()
             
-            # Limit frequency range for visualization
+            mins.append(block_min)
+            maxs.append(block_max)
+            sumsq.append(np.sum(np.square(rows, dtype=np.float64), axis=1))
+            
+            frames = len(data) // frame
+            if frames:
+                magnitudes = np.abs(np.fft.rfft(data[:frames * frame].reshape(frames, frame) * window, axis=1))
+                spectrum += magnitudes.sum(axis=0)
+                spectrum_frames += frames
+        
+        if spectrum_frames == 0 and info.frames:
+            # Files shorter than one frame still get a (zero-padded) spectrum
+            data, _ = self.read_mono(audio_file, dtype='float32')
+            padded = np.zeros(frame, dtype=np.float32)
+            padded[:len(data)] = data[:frame]
+            spectrum = np.abs(np.fft.rfft(padded * window))
+            spectrum_frames = 1
+        
+        levels = {'min_0': np.concatenate(mins) if mins else np.zeros(0, dtype=np.float32),
+                  'max_0': np.concatenate(maxs) if maxs else np.zeros(0, dtype=np.float32),
+                  'sumsq_0': np.concatenate(sumsq) if sumsq else np.zeros(0)}
+        
+        # Coarser levels reduce the previous one until it fits in a few hundred buckets
+        level = 0
+        while len(levels[f'min_{level}']) > 256:
+            edges = np.arange(0, len(levels[f'min_{level}']), self.pyramid_factor)
+            levels[f'min_{level + 1}'] = np.minimum.reduceat(levels[f'min_{level}'], edges)
+            levels[f'max_{level + 1}'] = np.maximum.reduceat(levels[f'max_{level}'], edges)
+            levels[f'sumsq_{level + 1}'] = np.add.reduceat(levels[f'sumsq_{level}'], edges)
+            level += 1
+        
+        pyramid = dict(levels)
+        pyramid.update({
+            'levels': level + 1,
+            'base': base,
+            'factor': self.pyramid_factor,
+            'sample_rate': info.samplerate,
+            'num_samples': info.frames,
+            'spectrum': spectrum / max(spectrum_frames, 1)
+        })
+        
+        # Concurrent builds each write their own scratch file; the last rename wins
+        path = self.get_pyramid_path(audio_file)
+        scratch_path = self.get_scratch_path(path)
+        try:
+            with open(scratch_path, 'wb') as f:
+                np.savez(f, **pyramid)
+            self.commit_side_file(scratch_path, path)
+        except Exception:
+            self.discard_side_file(scratch_path)
+            raise
+        return pyramid
+    
+    def get_waveform_pyramid(self, audio_file):
+        """Load the stored waveform pyramid, building it if missing or older than the audio"""
+        path = self.get_pyramid_path(audio_file)
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(audio_file):
+            with np.load(path) as stored:
+                return {key: stored[key] for key in stored.files}
+        return self.build_waveform_pyramid(audio_file)
+    
+    def get_waveform_window(self, audio_file, start=0.0, end=None, pixel_width=2000):
+        """Min/max/RMS envelope of a time window at pixel resolution, served from the pyramid"""
+        pyramid = self.get_waveform_pyramid(audio_file)
+        sample_rate = int(pyramid['sample_rate'])
+        num_samples = int(pyramid['num_samples'])
+        
+        first = min(max(int(start * sample_rate), 0), num_samples)
+        last = num_samples if end is None else min(max(int(end * sample_rate), first), num_samples)
+        if last <= first:
+            raise ValueError("Empty waveform window")
+        pixel_width = max(1, min(int(pixel_width), last - first))
+        samples_per_pixel = (last - first) / pixel_width
+        
+        base = int(pyramid['base'])
+        factor = int(pyramid['factor'])
+        if samples_per_pixel < base:
+            # Zoomed in past the finest level: read just this window from the file
+            data, _ = sf.read(audio_file, start=first, stop=last, dtype='float32')
+            if data.ndim > 1:
+                data = data[:, 0]
+            level, bucket = -1, 1
+            mins = maxs = data
+            sumsq = np.square(data, dtype=np.float64)
+            offset = first
+        else:
+            # Coarsest level whose buckets still resolve single pixels
+            level = min(int(np.log(samples_per_pixel / base) / np.log(factor)), int(pyramid['levels']) - 1)
+            bucket = base * factor ** level
+            low, high = first // bucket, -(-last // bucket)
+            mins = pyramid[f'min_{level}'][low:high]
+            maxs = pyramid[f'max_{level}'][low:high]
+            sumsq = pyramid[f'sumsq_{level}'][low:high]
+            offset = low * bucket
+        
+        # Pixel boundaries as bucket indices; each pixel reduces its own run of buckets
+        pixel_starts = first + np.arange(pixel_width) * samples_per_pixel
+        edges = np.minimum(((pixel_starts - offset) // bucket).astype(np.intp), len(mins) - 1)
+        bucket_counts = np.minimum(bucket, num_samples - (offset + np.arange(len(mins)) * bucket))
+        
+        pixel_min = np.minimum.reduceat(mins, edges)
+        pixel_max = np.maximum.reduceat(maxs, edges)
+        pixel_rms = np.sqrt(np.add.reduceat(sumsq, edges) / np.add.reduceat(bucket_counts, edges))
+        
+        return {
+            'time': (pixel_starts + samples_per_pixel / 2) / sample_rate,
+            'min': pixel_min,
+            'max': pixel_max,
+            'rms': pixel_rms,
+            'level': level,
+            'samples_per_pixel': samples_per_pixel,
+            'sample_rate': sample_rate,
+            'duration': num_samples / sample_rate
+        }
+    
+    def get_spectrogram_path(self, audio_file):
+        """Location of the quantized spectrogram stored for an audio file"""
+        return self.get_side_file_path(audio_file, 'spectrogram.npy')
+    
+    def build_spectrogram(self, audio_file):
+        """Compute the STFT of a whole file block by block into a uint8 dB memmap"""
+        info = sf.info(audio_file)
+        frame = self.spectrogram_frame
+        hop = self.spectrogram_hop
+        window = np.hanning(frame).astype(np.float32)
+        bins = frame // 2  # Nyquist bin dropped so bands split evenly
+        
+        # The signal is zero-padded by one frame so the last samples get a column
+        num_frames = info.frames // hop + 1
+        
+        # Built under a scratch name so tile requests never read a spectrogram still being filled
+        path = self.get_spectrogram_path(audio_file)
+        scratch_path = self.get_scratch_path(path)
+        try:
+            spectrogram = np.lib.format.open_memmap(scratch_path, mode='w+', dtype=np.uint8,
+                                                    shape=(num_frames, bins))
+            
+            # A full-scale sine reaches |X| = sum(window) / 2
+            reference = float(window.sum()) / 2
+            floor = self.spectrogram_floor_db
+            
+            def blocks():
+                for data in sf.blocks(audio_file, blocksize=self.block_size, dtype='float32'):
+                    yield data[:, 0] if data.ndim > 1 else data
+                yield np.zeros(frame, dtype=np.float32)
+            
+            carry = np.zeros(0, dtype=np.float32)
+            written = 0
+            for data in blocks():
+                pending = np.concatenate([carry, data])
+                count = min((len(pending) - frame) // hop + 1 if len(pending) >= frame else 0, num_frames - written)
+                if count <= 0:
+                    carry = pending
+                    continue
+                
+                frames = np.lib.stride_tricks.sliding_window_view(pending, frame)[::hop][:count]
+                magnitudes = np.abs(np.fft.rfft(frames * window, axis=1))[:, :bins]
+                db = 20 * np.log10(np.maximum(magnitudes / reference, 1e-12))
+                spectrogram[written:written + count] = np.clip((db - floor) / -floor * 255, 0, 255).astype(np.uint8)
+                
+                written += count
+                carry = pending[count * hop:]
+            
+            spectrogram.flush()
+            del spectrogram
+            self.commit_side_file(scratch_path, path)
+        except Exception:
+            self.discard_side_file(scratch_path)
+            raise
+        return np.load(path, mmap_mode='r')
+    
+    def get_spectrogram(self, audio_file):
+        """Open the cached spectrogram as a read-only memmap, building it if missing or stale"""
+        path = self.get_spectrogram_path(audio_file)
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(audio_file):
+            return np.load(path, mmap_mode='r')
+        return self.build_spectrogram(audio_file)
+    
+    def get_spectrogram_info(self, audio_file):
+        """Tile grid layout of an audio file's spectrogram"""
+        spectrogram = self.get_spectrogram(audio_file)
+        sample_rate = sf.info(audio_file).samplerate
+        frames, bins = spectrogram.shape
+        return {
+            'frames': frames,
+            'bins': bins,
+            'tile_frames': self.tile_frames,
+            'tile_bins': self.tile_bins,
+            'tiles_x': -(-frames // self.tile_frames),
+            'tiles_y': -(-bins // self.tile_bins),
+            'seconds_per_frame': self.spectrogram_hop / sample_rate,
+            'hz_per_bin': sample_rate / self.spectrogram_frame,
+            'floor_db': self.spectrogram_floor_db
+        }
+    
+    def get_spectrogram_tile(self, audio_file, tile_x, tile_y):
+        """One (time range x frequency band) tile as uint8 rows, highest frequency first"""
+        spectrogram = self.get_spectrogram(audio_file)
+        frames, bins = spectrogram.shape
+        
+        first_frame = tile_x * self.tile_frames
+        first_bin = tile_y * self.tile_bins
+        if tile_x < 0 or tile_y < 0 or first_frame >= frames or first_bin >= bins:
+            raise ValueError("Tile outside the spectrogram")
+        
+        # Edge tiles are padded to full size so every tile has the same shape
+        tile = np.zeros((self.tile_bins, self.tile_frames), dtype=np.uint8)
+        block = spectrogram[first_frame:first_frame + self.tile_frames, first_bin:first_bin + self.tile_bins]
+        tile[:block.shape[1], :block.shape[0]] = block.T
+        return tile[::-1]
+    
+    def get_visualization_data(self, audio_file):
+        """Get waveform and spectrum data for visualization"""
+        try:
+            window = self.get_waveform_window(audio_file, pixel_width=2000)
+            pyramid = self.get_waveform_pyramid(audio_file)
+            sample_rate = int(pyramid['sample_rate'])
+            
+            # Keep the extreme of each pixel so peaks survive the downsampling
+            amplitude = np.where(np.abs(window['max']) >= np.abs(window['min']), window['max'], window['min'])
+            
+            # Averaged spectrum from the full-rate signal, limited to 5kHz
+            frequencies = _rfft_bin_frequencies(self.spectrum_frame, sample_rate)
             freq_mask = frequencies <= 5000  # Show up to 5kHz
-            fft_data = fft_data[freq_mask]
-            frequencies = frequencies[freq_mask]
             
+            # Arrays stay numpy so callers pick the serialization (JSON lists or binary)
             return {
                 'waveform': {
-                    'time': time_axis.tolist(),
-                    'amplitude': audio_data.tolist()
+                    'time': window['time'],
+                    'amplitude': amplitude,
+                    'min': window['min'],
+                    'max': window['max'],
+                    'rms': window['rms']
                 },
                 'spectrum': {
-                    'frequency': frequencies.tolist(),
-                    'magnitude': fft_data.tolist()
+                    'frequency': frequencies[freq_mask],
+                    'magnitude': pyramid['spectrum'][freq_mask]
                 },
                 'sample_rate': sample_rate,
-                'duration': duration
+                'duration': window['duration']
             }
             
         except Exception as e:
             logger.error(f"Error generating visualization data: {str(e)}")
             return None
+
+
+class StreamDecoder:
+    """Incremental decoder for audio arriving in successive blocks
+    
+    feed() takes the next block of samples and returns whatever became decodable;
+    flush() decodes the remainder at the end of the stream. Only a partial frame (or,
+    for CPFSK/multi-tone, the timing acquisition window) is buffered between calls.
+    symbol_duration overrides the processor's multi-tone symbol duration, as FEC
+    payloads use fec_duration.
+    """
+    
+    # Symbols gathered before locking onto the symbol timing of separator-free modes
+    acquire_symbols = 64
+    # Block RMS below this is treated as silence while waiting for a transmission
+    silence_level = 0.01
+    
+    def __init__(self, processor, sample_rate, mode='text', modulation='tone', frequency_range=None, backend='fft',
+                 bands=None, levels=16, symbol_duration=None):
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.modulation = modulation
+        self.frequency_range = frequency_range or {'min': 800, 'max': 3000}
+        self.backend = backend
+        self.bands = bands
+        
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.finished = False
+        self.level = None
+        self.utf8 = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        
+        if modulation == 'multicarrier':
+            self.frame_size = processor.get_multicarrier_layout(self.frequency_range, sample_rate)['symbol_samples']
+        elif modulation == 'cpfsk':
+            self.frame_size = int(round(sample_rate * processor.cpfsk_duration))
+            self.candidates = processor.get_text_alphabet(self.frequency_range)
+        elif modulation == 'mfsk':
+            self.frame_size = int(round(sample_rate * (symbol_duration or processor.mfsk_duration)))
+            self.tone_groups = processor.get_mfsk_tone_groups(self.frequency_range)
+            self.candidates = self.tone_groups.ravel()
+        elif modulation == 'quantized':
+            self.frame_size = int(round(sample_rate * processor.quantized_duration))
+            self.candidates = processor.get_quantized_tones(levels, self.frequency_range)
+        else:
+            self.frame_size = int(sample_rate * processor.duration)
+        
+        # Separator-free modes must find the symbol boundaries before decoding
+        self.locked = modulation not in ('cpfsk', 'mfsk', 'quantized')
+    
+    def empty(self):
+        """Result of a call that decoded nothing"""
+        if self.mode == 'text':
+            return ''
+        return np.zeros((0, len(self.bands))) if self.bands is not None else np.zeros(0)
+    
+    def feed(self, samples):
+        """Append samples and return newly decoded symbols"""
+        if self.finished:
+            return self.empty()
+        
+        samples = np.asarray(samples, dtype=np.float32)
+        if samples.ndim > 1:
+            samples = samples[:, 0]
+        self.pending = np.concatenate([self.pending, samples])
+        
+        if not self.locked and not self.acquire(final=False):
+            return self.empty()
+        
+        # Decode every complete frame and carry the remainder over to the next call
+        usable = len(self.pending) // self.frame_size * self.frame_size
+        if usable == 0:
+            return self.empty()
+        signal = self.pending[:usable]
+        self.pending = self.pending[usable:].copy()
+        return self.decode(signal)
+    
+    def flush(self):
+        """Decode whatever is buffered at the end of the stream"""
+        if self.finished or (not self.locked and not self.acquire(final=True)):
+            self.finished = True
+            return self.decode(np.zeros(0, dtype=np.float32), final=True)
+        
+        signal, self.pending = self.pending, np.zeros(0, dtype=np.float32)
+        result = self.decode(signal, final=True)
+        self.finished = True
+        return result
+    
+    def acquire(self, final):
+        """Lock onto the symbol timing once enough of the transmission is buffered"""
+        hop = max(1, self.frame_size // 4)
+        blocks = len(self.pending) // hop
+        rms = np.sqrt(np.mean(np.square(self.pending[:blocks * hop].reshape(blocks, hop), dtype=np.float64), axis=1))
+        loud = np.flatnonzero(rms > self.silence_level)
+        
+        # Drop leading silence so waiting for a transmission never grows the buffer
+        if len(loud) == 0:
+            self.pending = self.pending[max(0, blocks - 1) * hop:]
+            return False
+        self.pending = self.pending[max(0, int(loud[0]) - 1) * hop:]
+        
+        if len(self.pending) < (self.acquire_symbols + 1) * self.frame_size and not final:
+            return False
+        
+        offset, symbols = self.processor.estimate_symbol_timing(
+            self.pending, self.sample_rate, self.frame_size, self.candidates, self.acquire_symbols)
+        if symbols == 0:
+            return False
+        
+        # Reference level of the transmission, used to detect where it ends
+        aligned = self.pending[offset:offset + min(symbols, self.acquire_symbols) * self.frame_size]
+        frames = aligned[:len(aligned) // self.frame_size * self.frame_size].reshape(-1, self.frame_size)
+        self.level = float(np.median(np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))))
+        
+        self.pending = self.pending[offset:]
+        self.locked = True
+        return True
+    
+    def decode(self, signal, final=False):
+        """Decode a frame-aligned signal according to the configured mode"""
+        processor = self.processor
+        
+        if self.level is not None and len(signal):
+            # Stop at the first frame that falls well below the transmission level
+            frames = len(signal) // self.frame_size
+            head = signal[:frames * self.frame_size].reshape(frames, self.frame_size)
+            quiet = np.flatnonzero(np.sqrt(np.mean(np.square(head, dtype=np.float64), axis=1)) < 0.5 * self.level)
+            if len(quiet):
+                signal = signal[:int(quiet[0]) * self.frame_size]
+                self.finished = True
+        
+        if self.modulation == 'multicarrier':
+            return processor.multicarrier_frequencies(signal, self.sample_rate, self.frequency_range)
+        
+        if self.modulation == 'cpfsk':
+            indices = processor.detect_alphabet_symbols(signal, self.sample_rate, self.frame_size, self.candidates)
+            return processor.indices_to_text(indices)
+        
+        if self.modulation == 'quantized':
+            indices = processor.detect_alphabet_symbols(signal, self.sample_rate, self.frame_size, self.candidates)
+            return np.clip(indices, 0, len(self.candidates) - 1).astype(np.uint8)
+        
+        if self.modulation == 'mfsk':
+            digits = processor.detect_tone_groups(signal, self.sample_rate, self.frame_size, self.tone_groups)
+            data = (digits @ (processor.mfsk_tones ** np.arange(processor.mfsk_groups))).astype(np.uint8).tobytes()
+            if self.mode == 'text':
+                return self.utf8.decode(data, final=final or self.finished)
+            return np.frombuffer(data, dtype=np.uint8)
+        
+        if self.mode == 'text':
+            if self.backend == 'goertzel':
+                alphabet = processor.get_text_alphabet(self.frequency_range)
+                indices = processor.detect_alphabet_symbols(signal, self.sample_rate, self.frame_size, alphabet)
+                return processor.indices_to_text(indices)
+            band = processor.get_text_band(self.frequency_range)
+            peaks = processor.detect_peak_frequencies(signal, self.sample_rate, self.frame_size, band=band)
+            return processor.freqs_to_text(peaks, self.frequency_range)
+        
+        return processor.detect_peak_frequencies(signal, self.sample_rate, self.frame_size, bands=self.bands)
+
+
+class WavStreamReader:
+    """Incremental WAV parser turning raw byte chunks into mono float32 samples
+    
+    Bytes can arrive split anywhere; the header is parsed as it arrives and partial
+    sample frames are carried over to the next chunk. Only the fmt chunk is held in
+    memory; other chunks before the data are skipped as their bytes go by, and a
+    header longer than max_header_bytes is rejected.
+    """
+    
+    max_header_bytes = 16 * 1024 * 1024
+    
+    def __init__(self):
+        self.buffer = b''
+        self.header_done = False
+        self.header_bytes = 0  # Bytes of RIFF header and chunks before the data seen so far
+        self.skip = 0  # Bytes of the current non-fmt chunk still to be dropped
+        self.sample_rate = None
+        self.channels = None
+        self.dtype = None
+        self.scale = 1.0
+        self.offset = 0.0
+        self.remaining = None
+    
+    def feed(self, data):
+        """Append raw bytes and return the complete samples they made available"""
+        self.buffer += data
+        
+        if not self.header_done and not self.parse_header():
+            return np.zeros(0, dtype=np.float32)
+        
+        if self.remaining is not None and len(self.buffer) > self.remaining:
+            # Ignore trailing chunks after the data chunk
+            self.buffer = self.buffer[:self.remaining]
+        
+        frame_bytes = self.channels * self.dtype.itemsize
+        usable = len(self.buffer) // frame_bytes * frame_bytes
+        if usable == 0:
+            return np.zeros(0, dtype=np.float32)
+        
+        raw, self.buffer = self.buffer[:usable], self.buffer[usable:]
+        if self.remaining is not None:
+            self.remaining -= usable
+        
+        samples = np.frombuffer(raw, dtype=self.dtype).reshape(-1, self.channels)[:, 0]
+        return ((samples.astype(np.float32) - self.offset) * self.scale).astype(np.float32, copy=False)
+    
+    def parse_header(self):
+        """Consume RIFF chunks up to the start of the data chunk; False until enough bytes arrived"""
+        if self.header_bytes == 0:
+            if len(self.buffer) < 12:
+                return False
+            if self.buffer[:4] != b'RIFF' or self.buffer[8:12] != b'WAVE':
+                raise ValueError("Stream is not a RIFF/WAVE file")
+            self.buffer = self.buffer[12:]
+            self.header_bytes = 12
+        
+        while True:
+            if self.skip:
+                dropped = min(self.skip, len(self.buffer))
+                self.buffer = self.buffer[dropped:]
+                self.skip -= dropped
+                if self.skip:
+                    return False
+            
+            if len(self.buffer) < 8:
+                return False
+            chunk_id, chunk_size = struct.unpack('<4sI', self.buffer[:8])
+            
+            if chunk_id == b'data':
+                if self.sample_rate is None:
+                    raise ValueError("WAV data chunk before fmt chunk")
+                self.buffer = self.buffer[8:]
+                # Streaming writers often leave the data size at 0 or 0xFFFFFFFF
+                self.remaining = chunk_size if 0 < chunk_size < 0xFFFFFFFF else None
+                self.header_done = True
+                return True
+            
+            # Chunks are word aligned
+            padded_size = chunk_size + (chunk_size & 1)
+            if self.header_bytes + 8 + padded_size > self.max_header_bytes:
+                raise ValueError(f"WAV header is larger than {self.max_header_bytes} bytes")
+            
+            if chunk_id == b'fmt ':
+                if len(self.buffer) < 8 + chunk_size:
+                    return False
+                fmt_tag, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', self.buffer[8:24])
+                if fmt_tag == 0xFFFE:
+                    # WAVE_FORMAT_EXTENSIBLE keeps the real format tag in the sub-format GUID
+                    fmt_tag = struct.unpack('<H', self.buffer[32:34])[0]
+                self.configure(fmt_tag, channels, sample_rate, bits)
+            
+            self.buffer = self.buffer[8:]
+            self.header_bytes += 8 + padded_size
+            self.skip = padded_size
+    
+    def configure(self, fmt_tag, channels, sample_rate, bits):
+        """Set up sample conversion from the fmt chunk"""
+        self.channels = channels
+        self.sample_rate = sample_rate
+        
+        if fmt_tag == 1 and bits == 16:
+            self.dtype, self.scale = np.dtype('<i2'), 1 / 32768
+        elif fmt_tag == 1 and bits == 32:
+            self.dtype, self.scale = np.dtype('<i4'), 1 / 2147483648
+        elif fmt_tag == 1 and bits == 8:
+            self.dtype, self.scale, self.offset = np.dtype('u1'), 1 / 128, 128.0
+        elif fmt_tag == 3 and bits == 32:
+            self.dtype = np.dtype('<f4')
+        else:
+            raise ValueError(f"Unsupported WAV sample format (format {fmt_tag}, {bits} bits)")
+
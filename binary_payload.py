@@ -0,0 +1,90 @@
+"""
+Compact binary encoding for visualization payloads
+
+Layout (all little-endian):
+    magic      4 bytes  b'SNFA'
+    version    uint8
+    count      uint8    number of arrays
+    reserved   uint16
+    meta_len   uint32   length of the UTF-8 JSON metadata that follows
+    metadata   meta_len bytes (scalar fields such as sample_rate and duration)
+    count x array descriptor:
+        name_len  uint8, name (UTF-8)
+        dtype     uint8  (1 = float32, 2 = int16 scaled by `scale`)
+        length    uint32 number of elements
+        scale     float32 (value = stored * scale for int16, 1.0 for float32)
+        offset    uint32 byte offset of the data from the start of the payload
+    array data, each array starting on a 4-byte boundary so clients can view it
+    directly as a Float32Array / Int16Array
+"""
+
+import json
+import struct
+import numpy as np
+
+MIMETYPE = 'application/octet-stream'
+MAGIC = b'SNFA'
+VERSION = 1
+
+DTYPE_FLOAT32 = 1
+DTYPE_INT16 = 2
+
+_DESCRIPTOR = struct.Struct('<BIfI')
+
+
+def pack_arrays(arrays, metadata=None, int16_fields=()):
+    """Pack named 1-D arrays and scalar metadata into one binary payload
+
+    Fields listed in int16_fields hold values in [-1, 1] and are stored as int16.
+    """
+    meta = json.dumps(metadata or {}, separators=(',', ':')).encode('utf-8')
+    
+    encoded = []
+    for name, values in arrays.items():
+        values = np.asarray(values).ravel()
+        if name in int16_fields:
+            data = np.rint(np.clip(values, -1, 1) * 32767).astype('<i2')
+            encoded.append((name.encode('utf-8'), DTYPE_INT16, 1 / 32767, data))
+        else:
+            encoded.append((name.encode('utf-8'), DTYPE_FLOAT32, 1.0, values.astype('<f4')))
+    
+    header_size = 12 + len(meta) + sum(1 + len(name) + _DESCRIPTOR.size for name, _, _, _ in encoded)
+    offset = -(-header_size // 4) * 4
+    
+    header = [struct.pack('<4sBBHI', MAGIC, VERSION, len(encoded), 0, len(meta)), meta]
+    body = []
+    for name, dtype, scale, data in encoded:
+        header.append(struct.pack('<B', len(name)) + name)
+        header.append(_DESCRIPTOR.pack(dtype, len(data), scale, offset))
+        padding = -data.nbytes % 4
+        body.append(data.tobytes() + b'\0' * padding)
+        offset += data.nbytes + padding
+    
+    head = b''.join(header)
+    return head + b'\0' * (-len(head) % 4) + b''.join(body)
+
+
+def unpack_arrays(payload):
+    """Inverse of pack_arrays: returns (arrays as float32 numpy arrays, metadata dict)"""
+    magic, version, count, _, meta_len = struct.unpack_from('<4sBBHI', payload, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a visualization payload")
+    
+    position = 12
+    metadata = json.loads(payload[position:position + meta_len].decode('utf-8'))
+    position += meta_len
+    
+    arrays = {}
+    for _ in range(count):
+        name_len = payload[position]
+        name = payload[position + 1:position + 1 + name_len].decode('utf-8')
+        position += 1 + name_len
+        dtype, length, scale, offset = _DESCRIPTOR.unpack_from(payload, position)
+        position += _DESCRIPTOR.size
+        
+        if dtype == DTYPE_INT16:
+            arrays[name] = np.frombuffer(payload, dtype='<i2', count=length, offset=offset).astype(np.float32) * scale
+        else:
+            arrays[name] = np.frombuffer(payload, dtype='<f4', count=length, offset=offset)
+    
+    return arrays, metadata
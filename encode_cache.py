@@ -0,0 +1,87 @@
+"""
+Content-addressed cache of encoded audio
+
+An encode is identified by a SHA-256 over its payload bytes, its request options and
+the settings of the processors doing the synthesis, and its artifact is named after
+that key. Synthesis is deterministic, so a repeated request can be answered with
+the stored file and its AudioFile row without any DSP. The response fields of the
+original encode (download URL, image size and the like) are kept next to the
+artifact as <filename>.json.
+"""
+
+import hashlib
+import json
+import os
+from app import db, artifacts
+from models import AudioFile
+
+CACHE_VERSION = 1  # Bump whenever synthesis output changes for the same settings
+
+# Processor attributes that only affect speed, never the samples produced
+_IGNORED_SETTINGS = {'synthesis_workers', 'synthesis_tile', 'synthesis_parallel_min', 'block_size'}
+
+
+def get_settings(processor):
+    """Scalar configuration of a processor, as included in cache keys"""
+    return {name: value for name, value in sorted(vars(processor).items())
+            if isinstance(value, (bool, int, float, str)) and name not in _IGNORED_SETTINGS}
+
+
+def get_key(payload, options, *processors):
+    """Hex digest identifying an encode of payload bytes with the given options and processors"""
+    description = {
+        'version': CACHE_VERSION,
+        'options': options,
+        'settings': [get_settings(processor) for processor in processors]
+    }
+    digest = hashlib.sha256(json.dumps(description, sort_keys=True, default=str).encode('utf-8'))
+    digest.update(bytes(payload))
+    return digest.hexdigest()
+
+
+def lookup(filename):
+    """(AudioFile, response fields) of a cached artifact, or None on a miss"""
+    if artifacts.locate(filename) is None:
+        return None
+    metadata_path = artifacts.locate(f"{filename}.json")
+    if metadata_path is None:
+        return None
+
+    audio_file = AudioFile.query.filter_by(filename=filename).first()
+    if audio_file is None:
+        return None
+
+    with open(metadata_path) as f:
+        return audio_file, json.load(f)
+
+
+def store(scratch_path, filename, fields, **record):
+    """Commit a finished artifact to the store and record it; returns its AudioFile
+
+    record holds the AudioFile columns used when the artifact has no row yet.
+    """
+    metadata_path = artifacts.scratch_path(f"{filename}.json")
+    with open(metadata_path, 'w') as f:
+        json.dump(fields, f)
+    # Sized before the commit, after which a sweep may already remove it
+    file_size = os.path.getsize(scratch_path)
+    artifacts.commit(scratch_path, filename)
+    artifacts.commit(metadata_path, f"{filename}.json")
+
+    # An evicted artifact keeps its row; refresh it instead of adding another
+    audio_file = AudioFile.query.filter_by(filename=filename).first() or AudioFile(filename=filename, **record)
+    audio_file.file_size = file_size
+    db.session.add(audio_file)
+    db.session.commit()
+    return audio_file
+
+
+def synthesize(processor, blocks, filename, fields, **record):
+    """Write PCM blocks as a cached artifact; returns False when synthesis fails"""
+    scratch_path = artifacts.scratch_path(filename)
+    if not processor.encode_blocks(blocks, scratch_path):
+        artifacts.discard(scratch_path)
+        return False
+
+    store(scratch_path, filename, fields, **record)
+    return True
@@ -0,0 +1,309 @@
+"""
+Reed-Solomon forward error correction over GF(256) with block interleaving
+
+A payload of L bytes is split into B equal-length (shortened) codewords of k data
+bytes plus `parity` check bytes each, B = ceil(L / (255 - parity)), with the last
+block zero-padded. The codewords are sent interleaved, byte i of every codeword
+before byte i + 1 of any, so a burst of misdetected symbols is spread across many
+codewords. Each codeword corrects any e errors and f erasures with 2e + f <= parity.
+
+Encoding and syndrome computation run on all codewords at once; only codewords
+with a non-zero syndrome go through Berlekamp-Massey, Chien search and Forney.
+"""
+
+import numpy as np
+
+PARITY = 32  # Check bytes per codeword, RS(255, 223) at full length
+VERIFY_MARGIN = 8  # Check bytes kept free of erasures when they must be trimmed, so a mis-decode is caught
+
+_PRIMITIVE = 0x11d
+
+_EXP = np.zeros(512, dtype=np.int64)
+_LOG = np.zeros(256, dtype=np.int64)
+_value = 1
+for _power in range(255):
+    _EXP[_power] = _value
+    _LOG[_value] = _power
+    _value <<= 1
+    if _value & 0x100:
+        _value ^= _PRIMITIVE
+_EXP[255:510] = _EXP[:255]
+
+# Plain lists for the scalar per-codeword path, which is much faster than numpy scalars
+_EXP_LIST = _EXP.tolist()
+_LOG_LIST = _LOG.tolist()
+
+
+class ReedSolomonError(ValueError):
+    """A codeword has more errors than its parity can correct"""
+
+
+def _mul(x, y):
+    if x == 0 or y == 0:
+        return 0
+    return _EXP_LIST[_LOG_LIST[x] + _LOG_LIST[y]]
+
+
+def _div(x, y):
+    if y == 0:
+        raise ZeroDivisionError()
+    if x == 0:
+        return 0
+    return _EXP_LIST[(_LOG_LIST[x] + 255 - _LOG_LIST[y]) % 255]
+
+
+def _pow(x, power):
+    return _EXP_LIST[(_LOG_LIST[x] * power) % 255]
+
+
+def _inverse(x):
+    return _EXP_LIST[255 - _LOG_LIST[x]]
+
+
+def _mul_array(a, b):
+    """Element-wise GF(256) product of integer arrays"""
+    product = _EXP[_LOG[a] + _LOG[b]]
+    return np.where((a == 0) | (b == 0), 0, product)
+
+
+def _poly_scale(p, x):
+    return [_mul(coef, x) for coef in p]
+
+
+def _poly_add(p, q):
+    result = [0] * max(len(p), len(q))
+    for i, coef in enumerate(p):
+        result[i + len(result) - len(p)] = coef
+    for i, coef in enumerate(q):
+        result[i + len(result) - len(q)] ^= coef
+    return result
+
+
+def _poly_mul(p, q):
+    result = [0] * (len(p) + len(q) - 1)
+    for j, q_coef in enumerate(q):
+        for i, p_coef in enumerate(p):
+            result[i + j] ^= _mul(p_coef, q_coef)
+    return result
+
+
+def _poly_eval(poly, x):
+    y = poly[0]
+    for coef in poly[1:]:
+        y = _mul(y, x) ^ coef
+    return y
+
+
+def _poly_div(dividend, divisor):
+    out = list(dividend)
+    for i in range(len(dividend) - len(divisor) + 1):
+        coef = out[i]
+        if coef != 0:
+            for j in range(1, len(divisor)):
+                if divisor[j] != 0:
+                    out[i + j] ^= _mul(divisor[j], coef)
+    separator = -(len(divisor) - 1)
+    return out[:separator], out[separator:]
+
+
+def generator_poly(parity):
+    """Generator polynomial with roots alpha^0 .. alpha^(parity - 1), highest degree first"""
+    g = [1]
+    for i in range(parity):
+        g = _poly_mul(g, [1, _pow(2, i)])
+    return g
+
+
+def get_layout(length, parity=PARITY):
+    """(codewords, data bytes per codeword) used for a payload of `length` bytes"""
+    blocks = max(1, -(-length // (255 - parity)))
+    return blocks, max(1, -(-length // blocks))
+
+
+def encoded_length(length, parity=PARITY):
+    """Number of bytes encode produces for a payload of `length` bytes"""
+    blocks, data_length = get_layout(length, parity)
+    return blocks * (data_length + parity)
+
+
+def encode(data, parity=PARITY):
+    """Systematic Reed-Solomon encoding of bytes into interleaved codewords"""
+    blocks, data_length = get_layout(len(data), parity)
+    messages = np.zeros(blocks * data_length, dtype=np.int64)
+    messages[:len(data)] = np.frombuffer(bytes(data), dtype=np.uint8)
+    messages = messages.reshape(blocks, data_length)
+
+    # Polynomial division by the generator as an LFSR, advanced for every codeword at once
+    g = np.array(generator_poly(parity)[1:], dtype=np.int64)
+    remainder = np.zeros((blocks, parity), dtype=np.int64)
+    for j in range(data_length):
+        feedback = messages[:, j] ^ remainder[:, 0]
+        remainder[:, :-1] = remainder[:, 1:]
+        remainder[:, -1] = 0
+        remainder ^= _mul_array(feedback[:, None], g[None, :])
+
+    codewords = np.concatenate([messages, remainder], axis=1)
+    return codewords.T.astype(np.uint8).tobytes()
+
+
+def syndromes(codewords, parity=PARITY):
+    """Syndromes of a (codewords, n) array, evaluated for all codewords at once"""
+    codewords = np.asarray(codewords, dtype=np.int64)
+    result = np.zeros((len(codewords), parity), dtype=np.int64)
+    powers = np.arange(parity)
+    for j in range(codewords.shape[1]):
+        # Horner step: result * alpha^i + c_j
+        shifted = np.where(result == 0, 0, _EXP[(_LOG[result] + powers) % 255])
+        result = shifted ^ codewords[:, j:j + 1]
+    return result
+
+
+def _errata_locator(positions):
+    locator = [1]
+    for position in positions:
+        locator = _poly_mul(locator, _poly_add([1], [_pow(2, position), 0]))
+    return locator
+
+
+def _error_evaluator(synd, locator, parity):
+    _, remainder = _poly_div(_poly_mul(synd, locator), [1] + [0] * (parity + 1))
+    return remainder
+
+
+def _correct_errata(message, synd, positions):
+    coef_positions = [len(message) - 1 - p for p in positions]
+    locator = _errata_locator(coef_positions)
+    evaluator = _error_evaluator(synd[::-1], locator, len(locator) - 1)[::-1]
+
+    X = [_pow(2, coef) for coef in coef_positions]
+    magnitudes = [0] * len(message)
+    for i, Xi in enumerate(X):
+        Xi_inv = _inverse(Xi)
+        # Forney: formal derivative of the locator evaluated at Xi^-1
+        derivative = 1
+        for j, Xj in enumerate(X):
+            if j != i:
+                derivative = _mul(derivative, 1 ^ _mul(Xi_inv, Xj))
+        if derivative == 0:
+            raise ReedSolomonError("Could not find error magnitude")
+        y = _mul(Xi, _poly_eval(evaluator[::-1], Xi_inv))
+        magnitudes[positions[i]] = _div(y, derivative)
+
+    return _poly_add(message, magnitudes)
+
+
+def _error_locator(synd, parity, erase_count=0):
+    locator, old_locator = [1], [1]
+    shift = len(synd) - parity if len(synd) > parity else 0
+    for i in range(parity - erase_count):
+        K = i + shift
+        delta = synd[K]
+        for j in range(1, len(locator)):
+            delta ^= _mul(locator[-(j + 1)], synd[K - j])
+        old_locator = old_locator + [0]
+        if delta != 0:
+            if len(old_locator) > len(locator):
+                new_locator = _poly_scale(old_locator, delta)
+                old_locator = _poly_scale(locator, _inverse(delta))
+                locator = new_locator
+            locator = _poly_add(locator, _poly_scale(old_locator, delta))
+
+    while locator and locator[0] == 0:
+        del locator[0]
+    if (len(locator) - 1 - erase_count) * 2 + erase_count > parity:
+        raise ReedSolomonError("Too many errors to correct")
+    return locator
+
+
+def _find_errors(locator, length):
+    errors = len(locator) - 1
+    positions = [length - 1 - i for i in range(length) if _poly_eval(locator, _pow(2, i)) == 0]
+    if len(positions) != errors:
+        raise ReedSolomonError("Could not locate the errors")
+    return positions
+
+
+def _forney_syndromes(synd, erasures, length):
+    forney = list(synd)
+    for position in erasures:
+        x = _pow(2, length - 1 - position)
+        for j in range(len(forney) - 1):
+            forney[j] = _mul(forney[j], x) ^ forney[j + 1]
+    return forney
+
+
+def correct_codeword(codeword, synd, parity=PARITY, erasures=()):
+    """Correct one codeword given its syndromes and known erasure positions"""
+    message = list(codeword)
+    erasures = list(erasures)
+    if len(erasures) > parity:
+        raise ReedSolomonError("Too many erasures to correct")
+
+    padded = [0] + list(synd)
+    forney = _forney_syndromes(padded[1:], erasures, len(message))
+    locator = _error_locator(forney, parity, len(erasures))
+    errors = _find_errors(locator[::-1], len(message))
+    return _correct_errata(message, padded, erasures + errors)
+
+
+def decode(received, length, parity=PARITY, erasures=(), confidence=None):
+    """Recover `length` payload bytes from interleaved codewords
+
+    erasures lists positions in the received stream known to be unreliable; bytes
+    missing from a truncated stream are erased too. A codeword with more erasures
+    than `parity` keeps only the parity - VERIFY_MARGIN with the lowest `confidence`
+    (one value per received byte); spending every check byte on erasures would
+    accept whatever codeword they produce. A codeword counts as corrected only if
+    it has zero syndromes afterwards; codewords that cannot be corrected are passed
+    through as received. Returns (data, corrected codewords, failed codewords).
+    """
+    blocks, data_length = get_layout(length, parity)
+    size = data_length + parity
+    stream = np.zeros(blocks * size, dtype=np.int64)
+    received = np.frombuffer(bytes(received), dtype=np.uint8)[:len(stream)]
+    stream[:len(received)] = received
+
+    erased = np.zeros(len(stream), dtype=bool)
+    erased[len(received):] = True
+    erasures = np.asarray(erasures, dtype=np.intp)
+    erased[erasures[erasures < len(stream)]] = True
+
+    # Missing bytes rank below every received one; without confidences earlier erasures win
+    rank = np.full(len(stream), -np.inf)
+    if confidence is None:
+        rank[:len(received)] = np.arange(len(received))
+    else:
+        rank[:len(received)] = np.asarray(confidence, dtype=np.float64)[:len(received)]
+
+    # Undo the interleaving: stream position t holds byte t // blocks of codeword t % blocks
+    codewords = stream.reshape(size, blocks).T.copy()
+    erased = erased.reshape(size, blocks).T
+    rank = rank.reshape(size, blocks).T
+
+    synd = syndromes(codewords, parity)
+    corrected = failed = 0
+    for index in np.flatnonzero(synd.any(axis=1)):
+        positions = np.flatnonzero(erased[index])
+        if np.isneginf(rank[index]).sum() > parity:
+            # More bytes missing than parity can rebuild
+            failed += 1
+            continue
+        if len(positions) > parity:
+            keep = max(0, parity - VERIFY_MARGIN)
+            positions = positions[np.argsort(rank[index, positions], kind='stable')[:keep]]
+        try:
+            candidate = correct_codeword(codewords[index].tolist(), synd[index].tolist(), parity,
+                                         sorted(positions.tolist()))
+        except ReedSolomonError:
+            failed += 1
+            continue
+
+        # Decoding can land on the wrong codeword; only a valid one is accepted
+        if syndromes([candidate], parity).any():
+            failed += 1
+        else:
+            codewords[index] = candidate
+            corrected += 1
+
+    data = codewords[:, :data_length].astype(np.uint8).tobytes()[:length]
+    return data, corrected, failed
@@ -1,77 +1,193 @@
 from PIL import Image
 import numpy as np
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+PROGRESSIVE_STRIDES = (16, 8, 4, 2, 1)
+
+
+@lru_cache(maxsize=16)
+def _progressive_order(width, height):
+    """Raster indices of a width x height image sent coarse-to-fine, one lattice per stride"""
+    ys, xs = np.mgrid[0:height, 0:width]
+    level = np.full((height, width), len(PROGRESSIVE_STRIDES) - 1)
+    
+    # A pixel belongs to the coarsest lattice it lies on
+    for index, stride in reversed(list(enumerate(PROGRESSIVE_STRIDES))):
+        level[(ys % stride == 0) & (xs % stride == 0)] = index
+    
+    order = np.argsort(level.ravel(), kind='stable')
+    order.setflags(write=False)
+    return order
+
+
 class ImageProcessor:
     def __init__(self):
         self.min_frequency = 800
         self.max_frequency = 3000
+        self.channel_guard = 0.05  # Fraction of each colour sub-band left empty as a guard
+        self.max_size = 100  # Default longest side, to prevent very long audio files
+        self.encoded_size = None  # (width, height) of the last image loaded for encoding
+        
+    def load_pixels(self, image_path, color=False, max_size=None):
+        """Open an image scaled to fit max_size as a uint8 (height, width[, 3]) array
+        
+        Also records the scaled (width, height) in encoded_size.
+        """
+        if max_size is None:
+            max_size = self.max_size
         
-    def image_to_frequencies(self, image_path):
-        """Convert image pixels to frequency data"""
+        # Open and process image
+        image = Image.open(image_path)
+        target_mode = 'RGB' if color else 'L'
+        
+        # Let the JPEG decoder produce a reduced-scale image directly, then shrink
+        # with reduce() before resampling, so large sources are never decoded in full
+        image.draft(target_mode, (max_size, max_size))
+        if image.mode in ('P', '1'):
+            # Palette and bilevel images only resample with nearest neighbour
+            image = image.convert(target_mode)
+        image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+        
+        # Convert to grayscale, or RGB for colour lanes
+        if image.mode != target_mode:
+            image = image.convert(target_mode)
+        
+        self.encoded_size = image.size
+        return np.asarray(image, dtype=np.uint8)
+    
+    def image_to_frequencies(self, image_path, color=False, order='raster', max_size=None):
+        """Convert image pixels to frequency data
+        
+        Grayscale gives one frequency per pixel. With color=True every pixel becomes a
+        row of three frequencies, R, G and B, each in its own sub-band. order='progressive'
+        sends a coarse full-frame lattice first and refines it, so any prefix gives a preview.
+        The image is scaled to fit max_size pixels; encoded_size records the result.
+        """
         try:
-            # Open and process image
-            image = Image.open(image_path)
-            
-            # Convert to grayscale
-            if image.mode != 'L':
-                image = image.convert('L')
-            
-            # Resize image to reasonable size for audio conversion
-            max_size = 100  # Limit to prevent very long audio files
-            image.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            pixel_array = self.load_pixels(image_path, color, max_size)
+            height, width = pixel_array.shape[:2]
             
-            # Convert to numpy array
-            pixel_array = np.array(image)
+            # Map pixel values (0-255) to frequencies through a lookup table
+            if color:
+                luts = np.stack([self.get_frequency_lut(band) for band in self.get_channel_bands()])
+                frequencies = luts[np.arange(3), pixel_array.reshape(-1, 3)]
+            else:
+                frequencies = self.get_frequency_lut()[pixel_array.ravel()]
             
-            # Flatten the image to 1D array
-            pixels = pixel_array.flatten()
-            
-            # Convert pixel values (0-255) to frequencies
-            frequencies = []
-            for pixel in pixels:
-                # Normalize pixel value to 0-1 range
-                normalized = pixel / 255.0
-                # Map to frequency range
-                frequency = self.min_frequency + normalized * (self.max_frequency - self.min_frequency)
-                frequencies.append(frequency)
+            if order == 'progressive':
+                frequencies = frequencies[_progressive_order(width, height)]
             
             logger.info(f"Successfully converted image to {len(frequencies)} frequencies")
             return frequencies
             
         except Exception as e:
             logger.error(f"Error converting image to frequencies: {str(e)}")
-            return []
+            return np.zeros(0)
+    
+    def quantize_pixels(self, pixels, levels, dither=True):
+        """Reduce grayscale pixels to level indices 0..levels-1, optionally with Floyd-Steinberg dithering"""
+        work = np.asarray(pixels, dtype=np.float64) * ((levels - 1) / 255.0)
+        if not dither:
+            return np.clip(np.rint(work), 0, levels - 1).astype(np.uint8)
+        
+        height, width = work.shape
+        indices = np.empty((height, width), dtype=np.uint8)
+        errors = np.empty(width)
+        for y in range(height):
+            # Error diffusion along the row is sequential...
+            row = work[y]
+            carry = 0.0
+            for x in range(width):
+                value = row[x] + carry
+                level = min(max(int(value + 0.5), 0), levels - 1)
+                indices[y, x] = level
+                errors[x] = value - level
+                carry = errors[x] * 7 / 16
+            
+            # ...but its share for the next row can be spread in one step
+            if y + 1 < height:
+                below = work[y + 1]
+                below += errors * (5 / 16)
+                below[:-1] += errors[1:] * (3 / 16)
+                below[1:] += errors[:-1] * (1 / 16)
+        
+        return indices
+    
+    def levels_to_pixels(self, indices, levels):
+        """Gray values of quantized level indices"""
+        return np.rint(np.asarray(indices, dtype=np.float64) * (255.0 / (levels - 1))).astype(np.uint8)
+    
+    def get_channel_bands(self):
+        """Disjoint (low, high) frequency sub-bands for the R, G and B lanes"""
+        edges = np.linspace(self.min_frequency, self.max_frequency, 4)
+        guard = (edges[1] - edges[0]) * self.channel_guard
+        return [(float(edges[i] + guard), float(edges[i + 1] - guard)) for i in range(3)]
+    
+    def get_frequency_lut(self, band=None):
+        """Frequency of every pixel value, indexed by the uint8 pixel"""
+        low, high = band if band is not None else (self.min_frequency, self.max_frequency)
+        return low + np.arange(256) / 255.0 * (high - low)
     
-    def frequencies_to_image(self, frequencies, width, height):
-        """Convert frequency data back to image"""
+    def frequencies_to_pixels(self, frequencies, band=None):
+        """Vectorized inverse of the pixel lookup table, rounding to the nearest level"""
+        low, high = band if band is not None else (self.min_frequency, self.max_frequency)
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        normalized = (frequencies - low) / (high - low)
+        return np.clip(np.rint(normalized * 255), 0, 255).astype(np.uint8)
+    
+    def fill_progressive(self, pixels, known, width, height):
+        """Fill pixels not yet received from the nearest received pixel of a coarser lattice"""
+        ys, xs = np.mgrid[0:height, 0:width]
+        pixels = pixels.reshape((height, width) + pixels.shape[1:])
+        known = known.reshape(height, width)
+        
+        # Finer lattices go first so every gap takes the closest anchor available
+        for stride in reversed(PROGRESSIVE_STRIDES[:-1]):
+            anchor_y, anchor_x = ys // stride * stride, xs // stride * stride
+            fill = ~known & known[anchor_y, anchor_x]
+            pixels[fill] = pixels[anchor_y[fill], anchor_x[fill]]
+            known = known | fill
+        
+        return pixels.reshape((width * height,) + pixels.shape[2:])
+    
+    def frequencies_to_image(self, frequencies, width, height, order='raster'):
+        """Convert frequency data back to image; (pixels, 3) colour lanes give an RGB image
+        
+        Any prefix of the transmission can be rendered. In progressive order the pixels
+        still missing are filled from the coarser levels already received.
+        """
         try:
+            frequencies = np.asarray(frequencies, dtype=np.float64)
+            color = frequencies.ndim == 2
+            
             # Convert frequencies back to pixel values
-            pixels = []
-            for freq in frequencies:
-                # Normalize frequency to 0-1 range
-                normalized = (freq - self.min_frequency) / (self.max_frequency - self.min_frequency)
-                # Convert to pixel value (0-255)
-                pixel_value = int(normalized * 255)
-                pixel_value = max(0, min(255, pixel_value))  # Clamp to valid range
-                pixels.append(pixel_value)
+            if color:
+                pixels = np.stack([self.frequencies_to_pixels(frequencies[:, channel], band)
+                                   for channel, band in enumerate(self.get_channel_bands())], axis=1)
+            else:
+                pixels = self.frequencies_to_pixels(frequencies)
             
-            # Reshape to image dimensions
+            # Pad or trim to the expected size
             expected_size = width * height
-            if len(pixels) != expected_size:
-                # Pad or trim to expected size
-                if len(pixels) < expected_size:
-                    pixels.extend([0] * (expected_size - len(pixels)))
-                else:
-                    pixels = pixels[:expected_size]
-            
-            # Convert to numpy array and reshape
-            pixel_array = np.array(pixels, dtype=np.uint8).reshape((height, width))
+            pixel_array = np.zeros((expected_size,) + pixels.shape[1:], dtype=np.uint8)
+            count = min(len(pixels), expected_size)
+            if order == 'progressive':
+                positions = _progressive_order(width, height)[:count]
+                pixel_array[positions] = pixels[:count]
+                known = np.zeros(expected_size, dtype=bool)
+                known[positions] = True
+                pixel_array = self.fill_progressive(pixel_array, known, width, height)
+            else:
+                pixel_array[:count] = pixels[:count]
             
             # Create image
-            image = Image.fromarray(pixel_array, mode='L')
+            if color:
+                image = Image.fromarray(pixel_array.reshape((height, width, 3)), mode='RGB')
+            else:
+                image = Image.fromarray(pixel_array.reshape((height, width)), mode='L')
             
             logger.info(f"Successfully converted frequencies to image ({width}x{height})")
             return image
@@ -0,0 +1,111 @@
+"""
+Background job engine for long encode and decode work
+
+Submitted work runs on a local thread pool inside the web process and is tracked by
+a ProcessingJob row, so any web worker can answer status requests while request
+threads stay free. A work function takes a progress callback (fraction 0..1) and
+returns a JSON-serializable result, which is kept in the artifact store as
+job_<id>.json; a 'filename' entry in the result becomes the job's output_file.
+"""
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app import app, db, artifacts
+from models import ProcessingJob
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=app.config['JOB_WORKERS'], thread_name_prefix='job')
+
+
+def get_result_name(job_id):
+    """Artifact name of a finished job's result"""
+    return f"job_{job_id}.json"
+
+
+def submit(job_type, work, input_file=None):
+    """Queue work on the pool and return its pending ProcessingJob
+
+    input_file, typically an uploaded scratch file, is removed once the job ends.
+    """
+    job = ProcessingJob(job_type=job_type, status='pending', input_file=input_file, progress=0)
+    db.session.add(job)
+    db.session.commit()
+
+    _executor.submit(_run, job.id, work)
+    return job
+
+
+def iter_with_progress(blocks, num_samples, progress):
+    """Pass PCM blocks through while reporting the fraction of samples produced"""
+    done = 0
+    for block in blocks:
+        yield block
+        done += len(block)
+        progress(done / max(1, num_samples))
+
+
+def _run(job_id, work):
+    with app.app_context():
+        job = db.session.get(ProcessingJob, job_id)
+        job.status = 'processing'
+        db.session.commit()
+
+        def progress(fraction):
+            # Only whole-percent steps reach the database; 100 is reserved for completion
+            percent = min(99, int(fraction * 100))
+            if percent > job.progress:
+                job.progress = percent
+                db.session.commit()
+
+        try:
+            result = work(progress)
+            result_path = artifacts.scratch_path(get_result_name(job_id))
+            with open(result_path, 'w') as f:
+                json.dump(result, f)
+            artifacts.commit(result_path, get_result_name(job_id))
+
+            job.output_file = result.get('filename')
+            job.status = 'completed'
+            job.progress = 100
+            logger.info(f"Job {job_id} ({job.job_type}) completed")
+
+        except Exception as e:
+            logger.error(f"Job {job_id} ({job.job_type}) failed: {str(e)}")
+            job.status = 'failed'
+            job.error_message = str(e)
+
+        finally:
+            if job.input_file:
+                artifacts.discard(job.input_file)
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+
+
+def get_status(job):
+    """JSON-ready summary of a job"""
+    status = {
+        'job_id': job.id,
+        'type': job.job_type,
+        'status': job.status,
+        'progress': job.progress,
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'completed_at': job.completed_at.isoformat() if job.completed_at else None
+    }
+    if job.status == 'completed':
+        status['result_url'] = f'/api/jobs/{job.id}/result'
+    if job.status == 'failed':
+        status['error'] = job.error_message
+    return status
+
+
+def get_result(job_id):
+    """Result stored by a completed job, or None"""
+    path = artifacts.locate(get_result_name(job_id))
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
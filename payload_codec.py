@@ -0,0 +1,182 @@
+"""
+Lossless compression of text and pixel payloads for the byte-level (multi-tone) path
+
+Payload layout:
+    method   uint8    METHOD_STORED, METHOD_ZLIB or METHOD_LZMA
+    data     the (compressed) bytes
+
+Pixel payloads are filtered before compression, as in PNG: every row of
+width * channels bytes is preceded by a filter byte (FILTER_NONE, FILTER_SUB or
+FILTER_UP) and stores its difference from that prediction. Smooth and flat images
+turn into long runs of small values that compress far better than raw pixels.
+
+Quantized images (level indices 0..L-1) are instead coded as symbols of the same
+L-ary alphabet: each row becomes its difference from the row above (mod L), and
+the flattened residuals are run-length coded as (value, run length) where the run
+length minus one is a little-endian varint of base L/2, digits >= L/2 meaning
+more digits follow.
+"""
+
+import lzma
+import zlib
+import numpy as np
+
+METHOD_STORED = 0
+METHOD_ZLIB = 1
+METHOD_LZMA = 2
+
+METHODS = {'zlib': METHOD_ZLIB, 'lzma': METHOD_LZMA}
+
+FILTER_NONE = 0
+FILTER_SUB = 1
+FILTER_UP = 2
+
+
+def compress(data, method='zlib'):
+    """Compress bytes with the named method, falling back to stored when that is smaller"""
+    if method not in METHODS:
+        raise ValueError(f"Unknown compression method: {method}")
+
+    data = bytes(data)
+    if METHODS[method] == METHOD_LZMA:
+        packed = lzma.compress(data, format=lzma.FORMAT_RAW, filters=[{'id': lzma.FILTER_LZMA2, 'preset': 9}])
+    else:
+        packed = zlib.compress(data, 9)
+
+    if len(packed) >= len(data):
+        return bytes([METHOD_STORED]) + data
+    return bytes([METHODS[method]]) + packed
+
+
+def decompress(payload):
+    """Inverse of compress; raises ValueError on a corrupt or unknown payload"""
+    if not payload:
+        raise ValueError("Empty compressed payload")
+
+    method, data = payload[0], bytes(payload[1:])
+    try:
+        if method == METHOD_STORED:
+            return data
+        if method == METHOD_ZLIB:
+            return zlib.decompress(data)
+        if method == METHOD_LZMA:
+            return lzma.decompress(data, format=lzma.FORMAT_RAW, filters=[{'id': lzma.FILTER_LZMA2}])
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Corrupt compressed payload: {e}")
+    raise ValueError(f"Unknown compression method id: {method}")
+
+
+def filter_pixels(pixels):
+    """PNG-style filtering of a (height, width) or (height, width, channels) uint8 array
+
+    Each row gets the filter whose residuals have the smallest absolute sum.
+    """
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    channels = pixels.shape[2] if pixels.ndim == 3 else 1
+    rows = pixels.reshape(pixels.shape[0], -1)
+
+    # Residuals of every candidate filter for every row at once, modulo 256
+    left = np.zeros_like(rows)
+    left[:, channels:] = rows[:, :-channels]
+    above = np.zeros_like(rows)
+    above[1:] = rows[:-1]
+    candidates = np.stack([rows, rows - left, rows - above])
+
+    cost = np.abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+    choice = np.argmin(cost, axis=0).astype(np.uint8)
+    residuals = candidates[choice, np.arange(len(rows))]
+
+    return np.concatenate([choice[:, None], residuals], axis=1).tobytes()
+
+
+def unfilter_pixels(data, width, height, channels=1):
+    """Inverse of filter_pixels, returning a (height, width[, channels]) uint8 array"""
+    stride = width * channels
+    filtered = np.frombuffer(data, dtype=np.uint8)
+    if len(filtered) != height * (stride + 1):
+        raise ValueError("Filtered pixel data does not match the image size")
+    filtered = filtered.reshape(height, stride + 1)
+
+    rows = np.zeros((height, stride), dtype=np.uint8)
+    previous = np.zeros(stride, dtype=np.uint8)
+    for y in range(height):
+        kind, residual = filtered[y, 0], filtered[y, 1:]
+        if kind == FILTER_SUB:
+            # Running sum along each channel undoes the left prediction
+            row = np.cumsum(residual.reshape(width, channels), axis=0, dtype=np.uint8).ravel()
+        elif kind == FILTER_UP:
+            row = residual + previous
+        else:
+            row = residual
+        rows[y] = row
+        previous = row
+
+    return rows.reshape((height, width, channels) if channels > 1 else (height, width))
+
+
+def compress_text(text, method='zlib'):
+    """Compressed UTF-8 payload of a text"""
+    return compress(text.encode('utf-8'), method)
+
+
+def decompress_text(payload):
+    """Text from a compress_text payload"""
+    return decompress(payload).decode('utf-8', errors='replace')
+
+
+def compress_pixels(pixels, method='zlib'):
+    """Filtered and compressed payload of a uint8 pixel array"""
+    return compress(filter_pixels(pixels), method)
+
+
+def decompress_pixels(payload, width, height, channels=1):
+    """Pixel array from a compress_pixels payload"""
+    return unfilter_pixels(decompress(payload), width, height, channels)
+
+
+def encode_quantized_rows(indices, levels):
+    """Delta and run-length code a (height, width) array of level indices as L-ary symbols"""
+    indices = np.asarray(indices, dtype=np.int64)
+    residuals = indices.copy()
+    residuals[1:] = (indices[1:] - indices[:-1]) % levels
+    flat = residuals.ravel()
+
+    # Runs of identical residuals; unchanged rows collapse into long zero runs
+    starts = np.flatnonzero(np.concatenate([[True], flat[1:] != flat[:-1]]))
+    lengths = np.diff(np.append(starts, len(flat)))
+
+    base = levels // 2
+    symbols = []
+    for value, length in zip(flat[starts].tolist(), lengths.tolist()):
+        symbols.append(value)
+        remaining = length - 1
+        while remaining >= base:
+            symbols.append(remaining % base + base)
+            remaining //= base
+        symbols.append(remaining)
+    return np.array(symbols, dtype=np.uint8)
+
+
+def decode_quantized_rows(symbols, levels, width, height):
+    """Inverse of encode_quantized_rows; a truncated stream leaves the rest of the image at level 0"""
+    base = levels // 2
+    count = width * height
+    flat = np.zeros(count, dtype=np.int64)
+
+    position = 0
+    stream = iter(int(symbol) for symbol in symbols)
+    for value in stream:
+        length, scale = 0, 1
+        for digit in stream:
+            length += (digit % base) * scale
+            scale *= base
+            if digit < base:
+                break
+        flat[position:position + length + 1] = value
+        position += length + 1
+        if position >= count:
+            break
+
+    # Undo the row deltas top to bottom
+    residuals = flat.reshape(height, width)
+    return (np.cumsum(residuals, axis=0) % levels).astype(np.uint8)
@@ -0,0 +1,84 @@
+"""
+Self-describing preamble sent ahead of every encoded transmission
+
+The header is a fixed 28-byte record, sent as multi-tone symbols (one byte per
+symbol) in the default 800-3000 Hz band so a decoder can always find it before
+it knows anything else about the recording.
+
+Layout (all big-endian):
+    magic           4 bytes  b'SNFH'
+    version         uint8
+    mode            uint8    index into MODES
+    modulation      uint8    index into MODULATIONS
+    flags           uint8    FLAG_* bits; bits 4-7 hold log2 of the level count of
+                             quantized images
+    width           uint16   image width in pixels (0 for text)
+    height          uint16   image height in pixels (0 for text)
+    symbol_us       uint32   symbol duration in microseconds
+    frequency_min   uint16   payload band in Hz
+    frequency_max   uint16
+    payload_length  uint32   characters, bytes or pixels that follow
+    crc             uint32   CRC-32 of the preceding 24 bytes
+"""
+
+import struct
+import zlib
+
+MAGIC = b'SNFH'
+VERSION = 1
+
+MODES = ('text', 'image')
+MODULATIONS = ('tone', 'cpfsk', 'mfsk', 'multicarrier', 'quantized')
+
+FLAG_COLOR = 0x01
+FLAG_PROGRESSIVE = 0x02
+FLAG_COMPRESSED = 0x04  # Payload is a payload_codec stream on the multi-tone byte path
+FLAG_FEC = 0x08  # Byte-path payload is Reed-Solomon coded and interleaved (see fec)
+LEVELS_SHIFT = 4
+QUANTIZED_LEVELS = (4, 8, 16, 32)
+
+_FIELDS = struct.Struct('>4sBBBBHHIHHI')
+HEADER_SIZE = _FIELDS.size + 4
+
+
+def pack_header(mode, modulation, symbol_duration, frequency_range, payload_length, width=0, height=0, flags=0):
+    """Pack transmission parameters into the fixed-size header record"""
+    fields = _FIELDS.pack(MAGIC, VERSION, MODES.index(mode), MODULATIONS.index(modulation), flags,
+                          width, height, int(round(symbol_duration * 1e6)),
+                          int(round(frequency_range['min'])), int(round(frequency_range['max'])), payload_length)
+    return fields + struct.pack('>I', zlib.crc32(fields))
+
+
+def levels_flags(levels):
+    """Flag bits announcing the level count of a quantized image"""
+    if levels not in QUANTIZED_LEVELS:
+        raise ValueError(f"Quantized level count must be one of {QUANTIZED_LEVELS}")
+    return (levels.bit_length() - 1) << LEVELS_SHIFT
+
+
+def unpack_header(data):
+    """Inverse of pack_header; raises ValueError unless data starts with an intact header"""
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Preamble is truncated")
+
+    fields = bytes(data[:_FIELDS.size])
+    (crc,) = struct.unpack_from('>I', data, _FIELDS.size)
+    if zlib.crc32(fields) != crc:
+        raise ValueError("Preamble checksum mismatch")
+
+    (magic, version, mode, modulation, flags, width, height, symbol_us,
+     frequency_min, frequency_max, payload_length) = _FIELDS.unpack(fields)
+    if magic != MAGIC or version != VERSION or mode >= len(MODES) or modulation >= len(MODULATIONS):
+        raise ValueError("Not a transmission preamble")
+
+    return {
+        'mode': MODES[mode],
+        'modulation': MODULATIONS[modulation],
+        'flags': flags,
+        'width': width,
+        'height': height,
+        'symbol_duration': symbol_us / 1e6,
+        'frequency_range': {'min': frequency_min, 'max': frequency_max},
+        'payload_length': payload_length,
+        'levels': 1 << (flags >> LEVELS_SHIFT) if flags >> LEVELS_SHIFT else 0
+    }
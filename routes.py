@@ -1,15 +1,23 @@
-import os
 import json
+import io
 import uuid
 from datetime import datetime
-from flask import render_template, request, jsonify, send_file, flash, redirect, url_for
+from flask import render_template, request, jsonify, send_file, flash, redirect, url_for, Response, stream_with_context
 from werkzeug.utils import secure_filename
-from app import app, db
-from models import AudioFile, ProcessingJob
-from audio_processor import AudioProcessor
+from PIL import Image
+from app import app, db, artifacts
+from models import ProcessingJob
+from audio_processor import AudioProcessor, StreamDecoder, WavStreamReader, MAX_WAV_BYTES
 from image_processor import ImageProcessor
 from openai_service import transcribe_audio_file
 from ai_frequency_optimizer import AIFrequencyOptimizer
+import binary_payload
+import preamble
+import payload_codec
+import fec
+import jobs
+import encode_cache
+import numpy as np
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,6 +27,354 @@ ALLOWED_EXTENSIONS = {'txt', 'wav', 'png', 'jpg', 'jpeg', 'gif', 'bmp'}
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def is_enabled(value):
+    """Interpret a JSON or form flag such as stream=1 / stream=true"""
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+def wants_binary():
+    """Content negotiation: binary arrays only when the client prefers them over JSON"""
+    best = request.accept_mimetypes.best_match(['application/json', binary_payload.MIMETYPE])
+    return best == binary_payload.MIMETYPE
+
+def binary_response(arrays, metadata, int16_fields=()):
+    """Respond with arrays packed in the compact binary visualization format"""
+    payload = binary_payload.pack_arrays(arrays, metadata, int16_fields)
+    response = Response(payload, mimetype=binary_payload.MIMETYPE)
+    response.headers['Vary'] = 'Accept'
+    return response
+
+def text_options(data):
+    """Text encoding options from JSON or form data; raises ValueError on an invalid combination"""
+    frequency_range = data.get('frequency_range', {'min': 800, 'max': 3000})
+    if isinstance(frequency_range, str):
+        try:
+            frequency_range = json.loads(frequency_range)
+        except ValueError:
+            frequency_range = {'min': 800, 'max': 3000}
+    
+    options = {
+        'modulation': data.get('modulation', 'tone'),
+        'frequency_range': frequency_range,
+        'header': is_enabled(data.get('header', True)),
+        'compress': data.get('compress'),
+        'with_fec': is_enabled(data.get('fec', False))
+    }
+    if options['compress'] and not options['header']:
+        raise ValueError('Compressed payloads need the preamble header')
+    if options['compress'] and options['compress'] not in payload_codec.METHODS:
+        raise ValueError(f"Unknown compression method: {options['compress']}")
+    if options['with_fec'] and not options['header']:
+        raise ValueError('Error-corrected payloads need the preamble header')
+    return options
+
+def image_options(form):
+    """Image encoding options from form data; raises ValueError on an invalid combination"""
+    options = {
+        'image_mode': form.get('image_mode', 'tone'),
+        'header': is_enabled(form.get('header', True)),
+        'color': is_enabled(form.get('color', False)),
+        'order': form.get('image_order', 'raster'),
+        'max_size': min(int(form.get('max_size', 100)), app.config['MAX_IMAGE_SIZE']),
+        'compress': form.get('compress'),
+        'levels': int(form.get('levels', 16)),
+        'dither': is_enabled(form.get('dither', True)),
+        'with_fec': is_enabled(form.get('fec', False))
+    }
+    if options['max_size'] < 1:
+        raise ValueError('max_size must be at least 1')
+    if options['color'] and options['image_mode'] in ('multicarrier', 'quantized'):
+        raise ValueError('Colour encoding is only available in tone mode')
+    if options['image_mode'] == 'quantized' and options['levels'] not in preamble.QUANTIZED_LEVELS:
+        raise ValueError(f'levels must be one of {preamble.QUANTIZED_LEVELS}')
+    if options['image_mode'] == 'quantized' and (options['compress'] or options['with_fec']):
+        raise ValueError('Quantized images are run-length coded and cannot be compressed or error-corrected')
+    if options['compress'] and not options['header']:
+        raise ValueError('Compressed payloads need the preamble header')
+    if options['compress'] and options['compress'] not in payload_codec.METHODS:
+        raise ValueError(f"Unknown compression method: {options['compress']}")
+    if options['with_fec'] and not options['compress']:
+        raise ValueError('Image error correction protects the compressed byte path')
+    return options
+
+def check_output_size(processor, num_samples, stored=True):
+    """Raise ValueError when the WAV of an encode is too large to write, or to keep when stored"""
+    size = processor.count_wav_bytes(num_samples)
+    if size > MAX_WAV_BYTES:
+        raise ValueError(f'Output would be {size / 2 ** 30:.1f} GiB, beyond the 4 GiB WAV limit; '
+                         f'send less data or a smaller image')
+    if stored and not artifacts.fits(size):
+        raise ValueError(f'Output would be {size / 2 ** 30:.1f} GiB, more than the artifact store keeps; '
+                         f'send less data or a smaller image')
+
+def byte_blocks(processor, payload, frequency_range=None, with_fec=False):
+    """PCM blocks, sample count and payload length of bytes on the multi-tone path"""
+    if with_fec:
+        return (processor.iter_fec_blocks(payload, frequency_range), processor.count_fec_samples(len(payload)),
+                len(payload))
+    return (processor.iter_mfsk_blocks(payload, frequency_range), processor.count_mfsk_samples(len(payload)),
+            len(payload))
+
+def text_blocks(processor, text, modulation, frequency_range, header=True, compress=None, with_fec=False):
+    """PCM blocks and sample count of a text transmission, optionally behind a preamble
+    
+    Compressed and FEC-protected text always travels on the multi-tone byte path and
+    needs the preamble.
+    """
+    flags = 0
+    if compress or with_fec or modulation == 'mfsk':
+        payload = payload_codec.compress_text(text, compress) if compress else text.encode('utf-8')
+        modulation = 'mfsk'
+        flags |= preamble.FLAG_COMPRESSED if compress else 0
+        flags |= preamble.FLAG_FEC if with_fec else 0
+        blocks, num_samples, payload_length = byte_blocks(processor, payload, frequency_range, with_fec)
+    elif modulation == 'cpfsk':
+        blocks, num_samples, payload_length = (processor.iter_cpfsk_blocks(text, frequency_range),
+                                               processor.count_cpfsk_samples(text), len(text))
+    else:
+        blocks, num_samples, payload_length = (processor.iter_text_blocks(text, frequency_range),
+                                               processor.count_text_samples(text), len(text))
+    
+    if header:
+        # Announce the parameters so decoders configure themselves
+        header_bytes = processor.build_preamble('text', modulation, frequency_range, payload_length, flags=flags)
+        blocks, num_samples = processor.with_preamble(header_bytes, blocks, num_samples)
+    return blocks, num_samples
+
+def image_blocks(processor, image_processor, image_path, image_mode='tone', header=True, color=False,
+                 order='raster', max_size=None, compress=None, levels=16, dither=True, with_fec=False):
+    """PCM blocks and sample count of an image transmission, or None when the image cannot be read
+    
+    Compressed images are sent as filtered, compressed pixels on the multi-tone byte
+    path, which needs the preamble; image_mode and order then do not apply, and
+    with_fec protects that path. The quantized mode sends run-length coded gray
+    levels (grayscale only).
+    """
+    flags = preamble.FLAG_COLOR if color else 0
+    if image_mode == 'quantized':
+        indices = image_processor.quantize_pixels(image_processor.load_pixels(image_path, False, max_size),
+                                                  levels, dither)
+        payload = payload_codec.encode_quantized_rows(indices, levels)
+        flags |= preamble.levels_flags(levels)
+        blocks = processor.iter_quantized_blocks(payload, levels)
+        num_samples = processor.count_quantized_samples(len(payload))
+        payload_length = len(payload)
+    elif compress:
+        payload = payload_codec.compress_pixels(image_processor.load_pixels(image_path, color, max_size), compress)
+        image_mode, flags = 'mfsk', flags | preamble.FLAG_COMPRESSED
+        flags |= preamble.FLAG_FEC if with_fec else 0
+        blocks, num_samples, payload_length = byte_blocks(processor, payload, with_fec=with_fec)
+    else:
+        frequencies = image_processor.image_to_frequencies(image_path, color=color, order=order, max_size=max_size)
+        if len(frequencies) == 0:
+            return None
+        if order == 'progressive':
+            flags |= preamble.FLAG_PROGRESSIVE
+        if image_mode == 'multicarrier':
+            blocks = processor.iter_multicarrier_blocks(frequencies)
+            num_samples = processor.count_multicarrier_samples(len(frequencies))
+        else:
+            blocks = processor.iter_frequency_blocks(frequencies)
+            num_samples = processor.count_frequency_samples(len(frequencies))
+        payload_length = len(frequencies)
+    
+    if header:
+        width, height = image_processor.encoded_size
+        frequency_range = {'min': image_processor.min_frequency, 'max': image_processor.max_frequency}
+        header_bytes = processor.build_preamble('image', image_mode, frequency_range, payload_length,
+                                                width, height, flags)
+        blocks, num_samples = processor.with_preamble(header_bytes, blocks, num_samples)
+    return blocks, num_samples
+
+def read_payload(processor, audio_file, header, frequency_range=None, start=0):
+    """Payload bytes of a byte-path transmission, error-corrected when the header says so"""
+    if header['flags'] & preamble.FLAG_FEC:
+        return processor.decode_audio_fec(audio_file, header['payload_length'], frequency_range, start) or b''
+    payload = processor.decode_audio_to_bytes(audio_file, frequency_range, start=start) or b''
+    return payload[:header['payload_length']]
+
+def payload_text(processor, audio_file, settings):
+    """Text carried on the byte path, decompressed when the header says so"""
+    payload = read_payload(processor, audio_file, settings['header'], settings['frequency_range'],
+                           settings['start'])
+    if settings['compressed']:
+        return payload_codec.decompress_text(payload)
+    return payload.decode('utf-8', errors='replace')
+
+def save_decoded_image(image_processor, image_array):
+    """Store a decoded image as a PNG artifact and return its filename"""
+    filename = f"decoded_image_{uuid.uuid4().hex}.png"
+    scratch_path = artifacts.scratch_path(filename)
+    if not image_processor.save_image_array(image_array, scratch_path):
+        artifacts.discard(scratch_path)
+        raise RuntimeError('Failed to save decoded image')
+    artifacts.commit(scratch_path, filename)
+    return filename
+
+def decode_settings(processor, audio_file, options):
+    """How to decode a recording: from its preamble when it has one, otherwise from the form options
+    
+    A preamble found in the recording is applied to the processor.
+    """
+    header, start = processor.read_preamble(audio_file)
+    if header is not None:
+        flags = header['flags']
+        processor.apply_preamble(header)
+        return {
+            'header': header,
+            'start': start,
+            'mode': header['mode'],
+            'modulation': header['modulation'],
+            'frequency_range': header['frequency_range'],
+            'backend': options.get('backend', 'fft'),
+            'color': bool(flags & preamble.FLAG_COLOR),
+            'order': 'progressive' if flags & preamble.FLAG_PROGRESSIVE else 'raster',
+            'width': header['width'],
+            'height': header['height'],
+            'levels': header['levels'],
+            'compressed': bool(flags & preamble.FLAG_COMPRESSED),
+            'protected': bool(flags & preamble.FLAG_FEC)
+        }
+    
+    mode = options.get('decode_mode', 'text')
+    return {
+        'header': None,
+        'start': 0,
+        'mode': mode,
+        'modulation': options.get('image_mode' if mode == 'image' else 'modulation', 'tone'),
+        'frequency_range': None,
+        'backend': options.get('backend', 'fft'),
+        'color': is_enabled(options.get('color', False)),
+        'order': options.get('image_order', 'raster'),
+        'width': int(options.get('width', 100)),
+        'height': int(options.get('height', 100)),
+        'levels': int(options.get('levels', 16)),
+        'compressed': False,
+        'protected': False
+    }
+
+def decode_file(processor, audio_file, settings):
+    """Decode a whole recording to text or a saved image; returns the result fields of /api/decode"""
+    header, start = settings['header'], settings['start']
+    frequency_range, modulation = settings['frequency_range'], settings['modulation']
+    
+    if settings['mode'] != 'image':
+        if settings['compressed'] or settings['protected']:
+            decoded_text = payload_text(processor, audio_file, settings)
+        elif modulation == 'cpfsk':
+            decoded_text = processor.decode_audio_cpfsk(audio_file, frequency_range, start=start)
+        elif modulation == 'mfsk':
+            decoded_text = processor.decode_audio_mfsk(audio_file, frequency_range, start=start)
+        else:
+            decoded_text = processor.decode_audio_to_text(audio_file, frequency_range, backend=settings['backend'],
+                                                          start=start)
+        return {'type': 'text', 'decoded_text': decoded_text, 'header': header}
+    
+    image_processor = ImageProcessor()
+    if header is not None:
+        image_processor.min_frequency = frequency_range['min']
+        image_processor.max_frequency = frequency_range['max']
+    color, width, height, levels = settings['color'], settings['width'], settings['height'], settings['levels']
+    if color and modulation in ('multicarrier', 'quantized'):
+        raise ValueError('Colour decoding is only available in tone mode')
+    
+    if modulation == 'quantized':
+        # Run-length coded gray levels
+        symbols = processor.decode_audio_quantized(audio_file, levels, frequency_range, start=start)
+        if header is not None:
+            symbols = symbols[:header['payload_length']]
+        indices = payload_codec.decode_quantized_rows(symbols, levels, width, height)
+        image_array = image_processor.levels_to_pixels(indices, levels)
+        received_pixels = width * height
+    elif settings['compressed']:
+        # Filtered, compressed pixels sent on the byte path
+        payload = read_payload(processor, audio_file, header, frequency_range, start)
+        image_array = payload_codec.decompress_pixels(payload, width, height, 3 if color else 1)
+        received_pixels = width * height
+    else:
+        # First decode frequencies from audio
+        if modulation == 'multicarrier':
+            frequencies = processor.decode_audio_multicarrier(audio_file, frequency_range, start=start)
+        else:
+            bands = image_processor.get_channel_bands() if color else None
+            frequencies = processor.decode_audio_to_frequencies(audio_file, frequency_range, bands=bands, start=start)
+        
+        # Convert frequencies back to image
+        # Progressive recordings render a full-frame preview from any prefix
+        image_array = image_processor.frequencies_to_image(frequencies, width, height, order=settings['order'])
+        received_pixels = min(len(frequencies), width * height)
+    
+    decoded_image_filename = save_decoded_image(image_processor, image_array)
+    return {
+        'type': 'image',
+        'image_url': f'/download/{decoded_image_filename}',
+        'width': width,
+        'height': height,
+        'received_pixels': received_pixels,
+        'header': header
+    }
+
+def streaming_wav_response(processor, blocks, num_samples, filename, cache_entry=None):
+    """Stream a WAV back while it is synthesized, teeing it into the cache when (fields, record) are given"""
+    scratch_path = artifacts.scratch_path(filename) if cache_entry is not None else None
+    
+    def generate():
+        try:
+            yield from processor.iter_wav_bytes(blocks, num_samples, scratch_path)
+        except GeneratorExit:
+            # The client went away; never keep a truncated artifact
+            if scratch_path is not None:
+                artifacts.discard(scratch_path)
+            raise
+        
+        if cache_entry is not None:
+            # Record the artifact once the full file is on disk
+            fields, record = cache_entry
+            encode_cache.store(scratch_path, filename, fields, **record)
+    
+    response = Response(stream_with_context(generate()), mimetype='audio/wav')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['X-Filename'] = filename
+    return response
+
+def cached_wav_response(filename, prepare, record, stream=False, save=True, error='Failed to encode audio'):
+    """Answer an encode from the cache, or synthesize it into the cache
+    
+    prepare() returns (processor, blocks, num_samples, response fields), or None when
+    the input cannot be encoded; record holds the AudioFile columns of a new artifact.
+    """
+    cached = encode_cache.lookup(filename)
+    if cached is not None:
+        _, fields = cached
+        if not stream:
+            return jsonify({'success': True, 'cached': True, **fields})
+        
+        # A sweep can evict the artifact after the lookup; it is then synthesized again below
+        artifact = artifacts.open(filename)
+        if artifact is not None:
+            response = send_file(artifact, mimetype='audio/wav', as_attachment=True, download_name=filename)
+            response.headers['X-Filename'] = filename
+            return response
+    
+    prepared = prepare()
+    if prepared is None:
+        return jsonify({'error': error}), 500
+    processor, blocks, num_samples, fields = prepared
+    fields = {'filename': filename, 'download_url': f'/download/{filename}', **fields}
+    try:
+        check_output_size(processor, num_samples, stored=save or not stream)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    if stream:
+        # Stream the WAV back as it is synthesized
+        return streaming_wav_response(processor, blocks, num_samples, filename, (fields, record) if save else None)
+    
+    if not encode_cache.synthesize(processor, blocks, filename, fields, **record):
+        return jsonify({'error': error}), 500
+    return jsonify({'success': True, 'cached': False, **fields})
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -27,50 +383,33 @@ def index():
 def encode_audio():
     try:
         # Handle both JSON and form data
-        if request.is_json:
-            data = request.get_json()
-            encoding_mode = data.get('mode', 'text')
-            text_input = data.get('text', '')
-            frequency_range = data.get('frequency_range', {'min': 800, 'max': 3000})
-        else:
-            # Handle form data
-            encoding_mode = request.form.get('mode', 'text')
-            text_input = request.form.get('text', '')
-            frequency_range_str = request.form.get('frequency_range', '{"min": 800, "max": 3000}')
-            try:
-                frequency_range = json.loads(frequency_range_str)
-            except:
-                frequency_range = {'min': 800, 'max': 3000}
+        data = request.get_json() if request.is_json else request.form
+        encoding_mode = data.get('mode', 'text')
+        text_input = data.get('text', '')
+        stream = is_enabled(data.get('stream', False))
+        save = is_enabled(data.get('save', True))
+        try:
+            options = text_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         processor = AudioProcessor()
         
         if encoding_mode == 'text' and text_input:
-            # Generate unique filename
-            filename = f"encoded_text_{uuid.uuid4().hex}.wav"
-            filepath = os.path.join(app.config['TEMP_FOLDER'], filename)
+            # Identical requests share one artifact
+            key = encode_cache.get_key(text_input.encode('utf-8'), {'mode': 'text', **options}, processor)
             
-            # Encode text to audio
-            success = processor.encode_text_to_audio(text_input, filepath, frequency_range)
+            def prepare():
+                blocks, num_samples = text_blocks(processor, text_input, **options)
+                return processor, blocks, num_samples, {}
             
-            if success:
-                # Save to database
-                audio_file = AudioFile(
-                    filename=filename,
-                    original_filename=f"text_input_{len(text_input)}_chars.wav",
-                    file_type='audio',
-                    encoding_mode='text',
-                    file_size=os.path.getsize(filepath)
-                )
-                db.session.add(audio_file)
-                db.session.commit()
-                
-                return jsonify({
-                    'success': True,
-                    'filename': filename,
-                    'download_url': f'/download/{filename}'
-                })
-            else:
-                return jsonify({'error': 'Failed to encode text'}), 500
+            record = {
+                'original_filename': f"text_input_{len(text_input)}_chars.wav",
+                'file_type': 'audio',
+                'encoding_mode': 'text'
+            }
+            return cached_wav_response(f"encoded_text_{key}.wav", prepare, record, stream, save,
+                                       'Failed to encode text')
         
         elif encoding_mode == 'image' and 'file' in request.files:
             # Handle image encoding
@@ -80,42 +419,34 @@ def encode_audio():
             
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                unique_filename = f"upload_{uuid.uuid4().hex}_{filename}"
-                filepath = os.path.join(app.config['TEMP_FOLDER'], unique_filename)
+                filepath = artifacts.scratch_path(f"upload_{filename}")
                 file.save(filepath)
                 
+                try:
+                    options = image_options(request.form)
+                except ValueError as e:
+                    artifacts.discard(filepath)
+                    return jsonify({'error': str(e)}), 400
+                
                 # Process image to audio
                 image_processor = ImageProcessor()
-                frequencies = image_processor.image_to_frequencies(filepath)
-                
-                # Generate audio file
-                audio_filename = f"encoded_image_{uuid.uuid4().hex}.wav"
-                audio_filepath = os.path.join(app.config['TEMP_FOLDER'], audio_filename)
+                with open(filepath, 'rb') as f:
+                    key = encode_cache.get_key(f.read(), {'mode': 'image', **options}, processor, image_processor)
                 
-                success = processor.encode_frequencies_to_audio(frequencies, audio_filepath)
+                def prepare():
+                    encoded = image_blocks(processor, image_processor, filepath, **options)
+                    if encoded is None:
+                        return None
+                    width, height = image_processor.encoded_size
+                    return processor, *encoded, {'width': width, 'height': height}
                 
-                # Clean up uploaded image
-                os.remove(filepath)
-                
-                if success:
-                    # Save to database
-                    audio_file = AudioFile(
-                        filename=audio_filename,
-                        original_filename=filename,
-                        file_type='audio',
-                        encoding_mode='image',
-                        file_size=os.path.getsize(audio_filepath)
-                    )
-                    db.session.add(audio_file)
-                    db.session.commit()
-                    
-                    return jsonify({
-                        'success': True,
-                        'filename': audio_filename,
-                        'download_url': f'/download/{audio_filename}'
-                    })
-                else:
-                    return jsonify({'error': 'Failed to encode image'}), 500
+                record = {'original_filename': filename, 'file_type': 'audio', 'encoding_mode': 'image'}
+                try:
+                    return cached_wav_response(f"encoded_image_{key}.wav", prepare, record, stream, save,
+                                               'Failed to encode image')
+                finally:
+                    # Clean up uploaded image
+                    artifacts.discard(filepath)
             else:
                 return jsonify({'error': 'Invalid file type'}), 400
         
@@ -137,61 +468,40 @@ def decode_audio():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            unique_filename = f"decode_{uuid.uuid4().hex}_{filename}"
-            filepath = os.path.join(app.config['TEMP_FOLDER'], unique_filename)
+            filepath = artifacts.scratch_path(f"decode_{filename}")
             file.save(filepath)
             
-            # Get decode mode (text or image)
-            decode_mode = request.form.get('decode_mode', 'text')
-            
             processor = AudioProcessor()
+            settings = decode_settings(processor, filepath, request.form)
             
-            if decode_mode == 'image':
-                # Decode as image
-                image_processor = ImageProcessor()
-                
-                # First decode frequencies from audio
-                frequencies = processor.decode_audio_to_frequencies(filepath)
-                
-                # Get image dimensions from form or use defaults
-                width = int(request.form.get('width', 100))
-                height = int(request.form.get('height', 100))
-                
-                # Convert frequencies back to image
-                image_array = image_processor.frequencies_to_image(frequencies, width, height)
-                
-                # Save decoded image
-                decoded_image_filename = f"decoded_image_{uuid.uuid4().hex}.png"
-                decoded_image_path = os.path.join(app.config['TEMP_FOLDER'], decoded_image_filename)
-                image_processor.save_image_array(image_array, decoded_image_path)
-                
-                # Clean up audio file
-                os.remove(filepath)
-                
-                return jsonify({
-                    'success': True,
-                    'type': 'image',
-                    'image_url': f'/download/{decoded_image_filename}',
-                    'original_filename': filename,
-                    'width': width,
-                    'height': height
-                })
-            else:
-                # Decode as text
-                decoded_text = processor.decode_audio_to_text(filepath)
+            if settings['mode'] == 'text' and is_enabled(request.form.get('stream', False)):
+                # Stream decoded text back block by block while the file is read
+                def generate():
+                    try:
+                        if settings['compressed'] or settings['protected']:
+                            # Compressed and error-corrected streams only decode once complete
+                            yield payload_text(processor, filepath, settings)
+                        else:
+                            yield from processor.iter_decode_audio(filepath, modulation=settings['modulation'],
+                                                                   frequency_range=settings['frequency_range'],
+                                                                   backend=settings['backend'],
+                                                                   start=settings['start'])
+                    finally:
+                        artifacts.discard(filepath)
                 
+                return Response(stream_with_context(generate()), mimetype='text/plain; charset=utf-8')
+            
+            try:
+                result = decode_file(processor, filepath, settings)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            finally:
                 # Clean up audio file
-                os.remove(filepath)
-                
-                if decoded_text:
-                    return jsonify({
-                        'success': True,
-                        'type': 'text',
-                        'decoded_text': decoded_text,
-                        'original_filename': filename
-                    })
-                else:
-                    return jsonify({'error': 'Failed to decode audio'}), 500
+                artifacts.discard(filepath)
+            
+            if result['type'] == 'text' and not result['decoded_text']:
+                return jsonify({'error': 'Failed to decode audio'}), 500
+            return jsonify({'success': True, 'original_filename': filename, **result})
         
         return jsonify({'error': 'Invalid file type'}), 400
         
@@ -199,6 +509,135 @@ def decode_audio():
         logger.error(f"Error in decode_audio: {str(e)}")
         return jsonify({'error': f'Decoding failed: {str(e)}'}), 500
 
+@app.route('/api/decode-stream', methods=['POST'])
+def decode_stream():
+    """Decode a raw WAV request body while it is still being uploaded"""
+    try:
+        # Streamed uploads are never buffered whole, so they get their own size limit
+        request.max_content_length = app.config['MAX_STREAM_CONTENT_LENGTH']
+        
+        decode_mode = request.args.get('decode_mode', 'text')
+        modulation = request.args.get('modulation', 'tone')
+        backend = request.args.get('backend', 'fft')
+        color = is_enabled(request.args.get('color', False))
+        order = request.args.get('image_order', 'raster')
+        width = int(request.args.get('width', 100))
+        height = int(request.args.get('height', 100))
+        levels = int(request.args.get('levels', 16))
+        
+        processor = AudioProcessor()
+        image_processor = ImageProcessor()
+        reader = WavStreamReader()
+        lead = []
+        pieces = []
+        
+        # Hold back the opening samples until there are enough to look for a preamble
+        buffered = 0
+        while True:
+            chunk = request.stream.read(64 * 1024)
+            if not chunk:
+                break
+            lead.append(reader.feed(chunk))
+            buffered += len(lead[-1])
+            if reader.header_done:
+                window = int(reader.sample_rate * processor.preamble_search)
+                if buffered >= window + processor.count_preamble_samples(reader.sample_rate):
+                    break
+        
+        if not reader.header_done:
+            return jsonify({'error': 'Request body is not a complete WAV header'}), 400
+        
+        samples = np.concatenate(lead)
+        header, start = processor.parse_preamble(samples, reader.sample_rate)
+        frequency_range = None
+        if header is not None:
+            processor.apply_preamble(header)
+            decode_mode, modulation = header['mode'], header['modulation']
+            frequency_range = header['frequency_range']
+            color = bool(header['flags'] & preamble.FLAG_COLOR)
+            order = 'progressive' if header['flags'] & preamble.FLAG_PROGRESSIVE else 'raster'
+            width, height = header['width'], header['height']
+            levels = header['levels']
+            image_processor.min_frequency = frequency_range['min']
+            image_processor.max_frequency = frequency_range['max']
+        compressed = header is not None and bool(header['flags'] & preamble.FLAG_COMPRESSED)
+        protected = header is not None and bool(header['flags'] & preamble.FLAG_FEC)
+        
+        if compressed or protected:
+            # Byte-path payloads are collected as raw bytes and corrected and unpacked at the end
+            decoder = StreamDecoder(processor, reader.sample_rate, mode='bytes', modulation='mfsk',
+                                    frequency_range=frequency_range,
+                                    symbol_duration=processor.fec_duration if protected else None)
+        else:
+            if color and (decode_mode != 'image' or modulation != 'tone'):
+                return jsonify({'error': 'Colour decoding is only available for tone-mode images'}), 400
+            bands = image_processor.get_channel_bands() if color else None
+            
+            decoder = StreamDecoder(processor, reader.sample_rate, mode=decode_mode, modulation=modulation,
+                                    frequency_range=frequency_range, backend=backend, bands=bands, levels=levels)
+        pieces.append(decoder.feed(samples[start:]))
+        
+        # Feed the decoder chunk by chunk as the rest of the body arrives
+        while True:
+            chunk = request.stream.read(64 * 1024)
+            if not chunk:
+                break
+            samples = reader.feed(chunk)
+            if len(samples):
+                pieces.append(decoder.feed(samples))
+        
+        pieces.append(decoder.flush())
+        
+        if compressed or protected:
+            payload = np.concatenate(pieces).astype(np.uint8).tobytes()
+            if protected:
+                payload, _, _ = fec.decode(payload, header['payload_length'])
+            payload = payload[:header['payload_length']]
+            if decode_mode == 'text':
+                pieces = [payload_codec.decompress_text(payload) if compressed
+                          else payload.decode('utf-8', errors='replace')]
+        
+        if decode_mode == 'image':
+            if modulation == 'quantized':
+                symbols = np.concatenate(pieces).astype(np.uint8)
+                if header is not None:
+                    symbols = symbols[:header['payload_length']]
+                indices = payload_codec.decode_quantized_rows(symbols, levels, width, height)
+                image_array = image_processor.levels_to_pixels(indices, levels)
+                received_pixels = width * height
+            elif compressed:
+                image_array = payload_codec.decompress_pixels(payload, width, height, 3 if color else 1)
+                received_pixels = width * height
+            else:
+                frequencies = np.concatenate(pieces)
+                image_array = image_processor.frequencies_to_image(frequencies, width, height, order=order)
+                received_pixels = min(len(frequencies), width * height)
+            
+            decoded_image_filename = save_decoded_image(image_processor, image_array)
+            
+            return jsonify({
+                'success': True,
+                'type': 'image',
+                'image_url': f'/download/{decoded_image_filename}',
+                'width': width,
+                'height': height,
+                'received_pixels': received_pixels,
+                'header': header
+            })
+        
+        return jsonify({
+            'success': True,
+            'type': 'text',
+            'decoded_text': ''.join(pieces),
+            'header': header
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in decode_stream: {str(e)}")
+        return jsonify({'error': f'Decoding failed: {str(e)}'}), 500
+
 @app.route('/api/encode-image', methods=['POST'])
 def encode_image():
     try:
@@ -211,42 +650,37 @@ def encode_image():
         
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            unique_filename = f"image_{uuid.uuid4().hex}_{filename}"
-            filepath = os.path.join(app.config['TEMP_FOLDER'], unique_filename)
+            filepath = artifacts.scratch_path(f"image_{filename}")
             file.save(filepath)
             
+            try:
+                options = image_options(request.form)
+            except ValueError as e:
+                artifacts.discard(filepath)
+                return jsonify({'error': str(e)}), 400
+            
             # Process image to audio
             image_processor = ImageProcessor()
             audio_processor = AudioProcessor()
+            with open(filepath, 'rb') as f:
+                key = encode_cache.get_key(f.read(), {'mode': 'image', **options}, audio_processor, image_processor)
             
-            # Convert image to frequency data
-            frequency_data = image_processor.image_to_frequencies(filepath)
-            
-            # Generate audio from frequency data
-            audio_filename = f"encoded_image_{uuid.uuid4().hex}.wav"
-            audio_filepath = os.path.join(app.config['TEMP_FOLDER'], audio_filename)
-            
-            success = audio_processor.encode_frequencies_to_audio(frequency_data, audio_filepath)
+            def prepare():
+                # Convert image to frequency data
+                encoded = image_blocks(audio_processor, image_processor, filepath, **options)
+                if encoded is None:
+                    return None
+                width, height = image_processor.encoded_size
+                return audio_processor, *encoded, {'width': width, 'height': height}
             
-            if success:
-                # Save to database
-                audio_file = AudioFile(
-                    filename=audio_filename,
-                    original_filename=f"image_{filename}.wav",
-                    file_type='audio',
-                    encoding_mode='image',
-                    file_size=os.path.getsize(audio_filepath)
-                )
-                db.session.add(audio_file)
-                db.session.commit()
-                
-                return jsonify({
-                    'success': True,
-                    'filename': audio_filename,
-                    'download_url': f'/download/{audio_filename}'
-                })
-            else:
-                return jsonify({'error': 'Failed to encode image'}), 500
+            record = {'original_filename': f"image_{filename}.wav", 'file_type': 'audio', 'encoding_mode': 'image'}
+            try:
+                return cached_wav_response(f"encoded_image_{key}.wav", prepare, record,
+                                           is_enabled(request.form.get('stream', False)),
+                                           is_enabled(request.form.get('save', True)), 'Failed to encode image')
+            finally:
+                # Clean up uploaded image
+                artifacts.discard(filepath)
         
         return jsonify({'error': 'Invalid file type'}), 400
         
@@ -254,6 +688,178 @@ def encode_image():
         logger.error(f"Error in encode_image: {str(e)}")
         return jsonify({'error': f'Image encoding failed: {str(e)}'}), 500
 
+@app.route('/api/jobs/encode', methods=['POST'])
+def submit_encode_job():
+    """Queue a text encode and return its job id right away"""
+    try:
+        data = request.get_json() if request.is_json else request.form
+        text_input = data.get('text', '')
+        if not text_input:
+            return jsonify({'error': 'No text provided'}), 400
+        try:
+            options = text_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        processor = AudioProcessor()
+        key = encode_cache.get_key(text_input.encode('utf-8'), {'mode': 'text', **options}, processor)
+        filename = f"encoded_text_{key}.wav"
+        
+        # Blocks are lazy, so sizing the output up front costs no synthesis
+        blocks, num_samples = text_blocks(processor, text_input, **options)
+        try:
+            check_output_size(processor, num_samples)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        def work(progress):
+            cached = encode_cache.lookup(filename)
+            if cached is not None:
+                return {'cached': True, **cached[1]}
+            
+            fields = {'filename': filename, 'download_url': f'/download/{filename}'}
+            if not encode_cache.synthesize(processor, jobs.iter_with_progress(blocks, num_samples, progress), filename,
+                                           fields, original_filename=f"text_input_{len(text_input)}_chars.wav",
+                                           file_type='audio', encoding_mode='text'):
+                raise RuntimeError('Failed to encode text')
+            return {'cached': False, **fields}
+        
+        job = jobs.submit('encode', work)
+        return jsonify({'success': True, **jobs.get_status(job)}), 202
+        
+    except Exception as e:
+        logger.error(f"Error in submit_encode_job: {str(e)}")
+        return jsonify({'error': f'Job submission failed: {str(e)}'}), 500
+
+@app.route('/api/jobs/encode-image', methods=['POST'])
+def submit_encode_image_job():
+    """Queue an image encode and return its job id right away"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file type'}), 400
+        
+        try:
+            options = image_options(request.form)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        filename = secure_filename(file.filename)
+        filepath = artifacts.scratch_path(f"image_{filename}")
+        file.save(filepath)
+        
+        image_processor = ImageProcessor()
+        audio_processor = AudioProcessor()
+        with open(filepath, 'rb') as f:
+            key = encode_cache.get_key(f.read(), {'mode': 'image', **options}, audio_processor, image_processor)
+        audio_filename = f"encoded_image_{key}.wav"
+        
+        # Blocks are lazy, so sizing the output up front costs no synthesis
+        try:
+            encoded = image_blocks(audio_processor, image_processor, filepath, **options)
+            if encoded is None:
+                raise RuntimeError('Failed to encode image')
+            blocks, num_samples = encoded
+            check_output_size(audio_processor, num_samples)
+        except ValueError as e:
+            artifacts.discard(filepath)
+            return jsonify({'error': str(e)}), 400
+        except Exception:
+            artifacts.discard(filepath)
+            raise
+        
+        def work(progress):
+            cached = encode_cache.lookup(audio_filename)
+            if cached is not None:
+                return {'cached': True, **cached[1]}
+            
+            width, height = image_processor.encoded_size
+            fields = {
+                'filename': audio_filename,
+                'download_url': f'/download/{audio_filename}',
+                'width': width,
+                'height': height
+            }
+            if not encode_cache.synthesize(audio_processor, jobs.iter_with_progress(blocks, num_samples, progress),
+                                           audio_filename, fields, original_filename=f"image_{filename}.wav",
+                                           file_type='audio', encoding_mode='image'):
+                raise RuntimeError('Failed to encode image')
+            return {'cached': False, **fields}
+        
+        job = jobs.submit('encode', work, input_file=filepath)
+        return jsonify({'success': True, **jobs.get_status(job)}), 202
+        
+    except Exception as e:
+        logger.error(f"Error in submit_encode_image_job: {str(e)}")
+        return jsonify({'error': f'Job submission failed: {str(e)}'}), 500
+
+@app.route('/api/jobs/decode', methods=['POST'])
+def submit_decode_job():
+    """Queue a decode of an uploaded recording and return its job id right away"""
+    try:
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
+        if not allowed_file(file.filename):
+            return jsonify({'error': 'Invalid file type'}), 400
+        
+        filename = secure_filename(file.filename)
+        filepath = artifacts.scratch_path(f"decode_{filename}")
+        file.save(filepath)
+        # The request is gone by the time the job runs
+        options = request.form.to_dict()
+        
+        def work(progress):
+            processor = AudioProcessor()
+            settings = decode_settings(processor, filepath, options)
+            progress(0.1)
+            
+            result = decode_file(processor, filepath, settings)
+            if result['type'] == 'text' and not result['decoded_text']:
+                raise RuntimeError('Failed to decode audio')
+            return {'original_filename': filename, **result}
+        
+        job = jobs.submit('decode', work, input_file=filepath)
+        return jsonify({'success': True, **jobs.get_status(job)}), 202
+        
+    except Exception as e:
+        logger.error(f"Error in submit_decode_job: {str(e)}")
+        return jsonify({'error': f'Job submission failed: {str(e)}'}), 500
+
+@app.route('/api/jobs/<int:job_id>')
+def job_status(job_id):
+    """Status and progress of a background job"""
+    job = db.session.get(ProcessingJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({'success': True, **jobs.get_status(job)})
+
+@app.route('/api/jobs/<int:job_id>/result')
+def job_result(job_id):
+    """Result of a completed background job, in the shape of the matching synchronous endpoint"""
+    job = db.session.get(ProcessingJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error_message, **jobs.get_status(job)}), 500
+    
+    if job.status != 'completed':
+        return jsonify({'error': 'Job has not finished', **jobs.get_status(job)}), 409
+    
+    result = jobs.get_result(job_id)
+    if result is None:
+        # The artifact store evicted the result after its TTL or to stay under quota
+        return jsonify({'error': 'Job result has expired; submit the job again', **jobs.get_status(job)}), 410
+    return jsonify({'success': True, **result})
+
 @app.route('/api/transcribe', methods=['POST'])
 def transcribe_audio():
     try:
@@ -266,12 +872,14 @@ def transcribe_audio():
         
         if file and file.filename.lower().endswith('.wav'):
             filename = secure_filename(file.filename)
-            unique_filename = f"transcribe_{uuid.uuid4().hex}_{filename}"
-            filepath = os.path.join(app.config['TEMP_FOLDER'], unique_filename)
+            filepath = artifacts.scratch_path(f"transcribe_{filename}")
             file.save(filepath)
             
             # Transcribe using OpenAI Whisper
-            transcript = transcribe_audio_file(filepath)
+            try:
+                transcript = transcribe_audio_file(filepath)
+            finally:
+                artifacts.discard(filepath)
             
             if transcript:
                 return jsonify({
@@ -313,16 +921,14 @@ def optimize_frequency():
                 return jsonify({'error': 'No file selected'}), 400
             
             # Save temporary file for analysis
-            temp_filename = f"temp_analysis_{uuid.uuid4().hex}.{file.filename.split('.')[-1]}"
-            temp_path = os.path.join(app.config['TEMP_FOLDER'], temp_filename)
+            temp_path = artifacts.scratch_path(f"temp_analysis.{file.filename.split('.')[-1]}")
             file.save(temp_path)
             
             try:
                 recommendations = optimizer.get_ai_recommendations('image', image_path=temp_path)
             finally:
                 # Clean up temp file
-                if os.path.exists(temp_path):
-                    os.remove(temp_path)
+                artifacts.discard(temp_path)
         
         else:
             return jsonify({'error': 'Invalid content type'}), 400
@@ -358,17 +964,33 @@ def visualize_audio():
         if file and file.filename.lower().endswith('.wav'):
             filename = secure_filename(file.filename)
             unique_filename = f"visualize_{uuid.uuid4().hex}_{filename}"
-            filepath = os.path.join(app.config['TEMP_FOLDER'], unique_filename)
-            file.save(filepath)
+            scratch_path = artifacts.scratch_path(unique_filename)
+            file.save(scratch_path)
+            # Kept as an artifact so the waveform and spectrogram routes can serve it
+            filepath = artifacts.commit(scratch_path, unique_filename)
             
             processor = AudioProcessor()
+            processor.artifacts = artifacts
             visualization_data = processor.get_visualization_data(filepath)
             
             if visualization_data:
+                waveform = visualization_data['waveform']
+                spectrum = visualization_data['spectrum']
+                
+                if wants_binary():
+                    arrays = {f'waveform.{key}': values for key, values in waveform.items()}
+                    arrays.update({f'spectrum.{key}': values for key, values in spectrum.items()})
+                    return binary_response(arrays, {
+                        'filename': unique_filename,
+                        'sample_rate': visualization_data['sample_rate'],
+                        'duration': visualization_data['duration']
+                    }, int16_fields=('waveform.amplitude', 'waveform.min', 'waveform.max'))
+                
                 return jsonify({
                     'success': True,
-                    'waveform': visualization_data['waveform'],
-                    'spectrum': visualization_data['spectrum'],
+                    'filename': unique_filename,
+                    'waveform': {key: values.tolist() for key, values in waveform.items()},
+                    'spectrum': {key: values.tolist() for key, values in spectrum.items()},
                     'sample_rate': visualization_data['sample_rate'],
                     'duration': visualization_data['duration']
                 })
@@ -381,16 +1003,115 @@ def visualize_audio():
         logger.error(f"Error in visualize_audio: {str(e)}")
         return jsonify({'error': f'Visualization failed: {str(e)}'}), 500
 
+@app.route('/api/waveform/<filename>')
+def waveform_window(filename):
+    """Serve a (start, end, width) waveform window of a stored WAV from its envelope pyramid"""
+    try:
+        if not filename or '..' in filename or '/' in filename or not filename.lower().endswith('.wav'):
+            return jsonify({'error': 'Invalid filename'}), 400
+        
+        filepath = artifacts.locate(filename)
+        if filepath is None:
+            return jsonify({'error': 'File not found'}), 404
+        
+        start = request.args.get('start', 0.0, type=float)
+        end = request.args.get('end', None, type=float)
+        width = request.args.get('width', 2000, type=int)
+        
+        processor = AudioProcessor()
+        processor.artifacts = artifacts
+        window = processor.get_waveform_window(filepath, start, end, width)
+        
+        if wants_binary():
+            return binary_response(
+                {'time': window['time'], 'min': window['min'], 'max': window['max'], 'rms': window['rms']},
+                {key: window[key] for key in ('level', 'samples_per_pixel', 'sample_rate', 'duration')},
+                int16_fields=('min', 'max')
+            )
+        
+        return jsonify({
+            'success': True,
+            'time': window['time'].tolist(),
+            'min': window['min'].tolist(),
+            'max': window['max'].tolist(),
+            'rms': window['rms'].tolist(),
+            'level': window['level'],
+            'samples_per_pixel': window['samples_per_pixel'],
+            'sample_rate': window['sample_rate'],
+            'duration': window['duration']
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in waveform_window: {str(e)}")
+        return jsonify({'error': f'Waveform failed: {str(e)}'}), 500
+
+@app.route('/api/spectrogram/<filename>')
+def spectrogram_info(filename):
+    """Describe the spectrogram tile grid of a stored WAV, computing the STFT on first use"""
+    try:
+        if not filename or '..' in filename or '/' in filename or not filename.lower().endswith('.wav'):
+            return jsonify({'error': 'Invalid filename'}), 400
+        
+        filepath = artifacts.locate(filename)
+        if filepath is None:
+            return jsonify({'error': 'File not found'}), 404
+        
+        processor = AudioProcessor()
+        processor.artifacts = artifacts
+        info = processor.get_spectrogram_info(filepath)
+        info['success'] = True
+        info['tile_url'] = f'/api/spectrogram/{filename}/{{x}}/{{y}}'
+        return jsonify(info)
+        
+    except Exception as e:
+        logger.error(f"Error in spectrogram_info: {str(e)}")
+        return jsonify({'error': f'Spectrogram failed: {str(e)}'}), 500
+
+@app.route('/api/spectrogram/<filename>/<int:tile_x>/<int:tile_y>')
+def spectrogram_tile(filename, tile_x, tile_y):
+    """Serve one spectrogram tile as a grayscale PNG, or raw uint8 rows with format=raw"""
+    try:
+        if not filename or '..' in filename or '/' in filename or not filename.lower().endswith('.wav'):
+            return jsonify({'error': 'Invalid filename'}), 400
+        
+        filepath = artifacts.locate(filename)
+        if filepath is None:
+            return jsonify({'error': 'File not found'}), 404
+        
+        processor = AudioProcessor()
+        processor.artifacts = artifacts
+        tile = processor.get_spectrogram_tile(filepath, tile_x, tile_y)
+        
+        if request.args.get('format') == 'raw':
+            response = Response(tile.tobytes(), mimetype='application/octet-stream')
+        else:
+            buffer = io.BytesIO()
+            Image.fromarray(tile, mode='L').save(buffer, format='PNG')
+            response = Response(buffer.getvalue(), mimetype='image/png')
+        
+        response.headers['X-Tile-Width'] = str(tile.shape[1])
+        response.headers['X-Tile-Height'] = str(tile.shape[0])
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+        return response
+        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error(f"Error in spectrogram_tile: {str(e)}")
+        return jsonify({'error': f'Spectrogram tile failed: {str(e)}'}), 500
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
-        # Security check - only allow files from temp folder
-        if not filename or '..' in filename or '/' in filename:
+        # Security check - only generated audio and images, never side files or job results
+        if not filename or '..' in filename or '/' in filename or not filename.lower().endswith(('.wav', '.png')):
             return jsonify({'error': 'Invalid filename'}), 400
         
-        filepath = os.path.join(app.config['TEMP_FOLDER'], filename)
-        if os.path.exists(filepath):
-            return send_file(filepath, as_attachment=True)
+        artifact = artifacts.open(filename)
+        if artifact is not None:
+            return send_file(artifact, as_attachment=True, download_name=filename)
         else:
             return jsonify({'error': 'File not found'}), 404
             
@@ -495,23 +1216,21 @@ def generate_custom():
         
         # Generate audio from custom frequencies
         audio_processor = AudioProcessor()
+        key = encode_cache.get_key(json.dumps(frequencies).encode('utf-8'),
+                                   {'mode': 'custom', 'frequency_range': frequency_range}, audio_processor)
         
-        # Generate unique filename
-        filename = f"custom_freq_{uuid.uuid4().hex}.wav"
-        filepath = os.path.join(app.config['TEMP_FOLDER'], filename)
+        def prepare():
+            if len(frequencies) == 0:
+                return None
+            return (audio_processor, audio_processor.iter_frequency_blocks(frequencies),
+                    audio_processor.count_frequency_samples(len(frequencies)), {'frequency_count': len(frequencies)})
         
-        # Create audio from frequency data
-        success = audio_processor.encode_frequencies_to_audio(frequencies, filepath)
-        
-        if success:
-            return jsonify({
-                'success': True,
-                'filename': filename,
-                'download_url': f'/download/{filename}',
-                'frequency_count': len(frequencies)
-            })
-        else:
-            return jsonify({'error': 'Failed to generate custom audio'}), 500
+        record = {
+            'original_filename': f"custom_{len(frequencies)}_frequencies.wav",
+            'file_type': 'audio',
+            'encoding_mode': 'custom'
+        }
+        return cached_wav_response(f"custom_freq_{key}.wav", prepare, record, error='Failed to generate custom audio')
             
     except Exception as e:
         logger.error(f"Error in generate_custom: {str(e)}")